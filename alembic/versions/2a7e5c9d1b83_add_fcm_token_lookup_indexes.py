@@ -0,0 +1,58 @@
+"""add_fcm_token_lookup_indexes
+
+Revision ID: 2a7e5c9d1b83
+Revises: f19b7c2d4a68
+Create Date: 2026-10-16 14:32:08.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2a7e5c9d1b83'
+down_revision = 'f19b7c2d4a68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # register_token kept one token per device, but concurrent registrations
+    # could still leave duplicates; keep the most recently used one
+    op.execute("""
+        DELETE FROM fcm_tokens t
+        USING fcm_tokens newer
+        WHERE t.user_id = newer.user_id
+          AND t.device_id = newer.device_id
+          AND (t.last_used_at, t.id) < (newer.last_used_at, newer.id)
+    """)
+
+    # Built concurrently so token registration isn't blocked on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_fcm_tokens_user_active',
+            'fcm_tokens',
+            ['user_id', 'is_active'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_fcm_tokens_user_device',
+            'fcm_tokens',
+            ['user_id', 'device_id'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_fcm_tokens_user_device',
+            table_name='fcm_tokens',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_fcm_tokens_user_active',
+            table_name='fcm_tokens',
+            postgresql_concurrently=True
+        )
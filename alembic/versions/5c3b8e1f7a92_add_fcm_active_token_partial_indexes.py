@@ -0,0 +1,50 @@
+"""add_fcm_active_token_partial_indexes
+
+Revision ID: 5c3b8e1f7a92
+Revises: 2a7e5c9d1b83
+Create Date: 2026-10-16 14:58:41.093176
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5c3b8e1f7a92'
+down_revision = '2a7e5c9d1b83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Token queries always filter on is_active = true, so index just the
+    # active subset by owner; this replaces the full (user_id, is_active) index
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_fcm_tokens_active_user',
+            'fcm_tokens',
+            ['user_id'],
+            unique=False,
+            postgresql_where=sa.text('is_active = true'),
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_fcm_tokens_user_active',
+            table_name='fcm_tokens',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_fcm_tokens_user_active',
+            'fcm_tokens',
+            ['user_id', 'is_active'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_fcm_tokens_active_user',
+            table_name='fcm_tokens',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,75 @@
+"""add_admin_business_analytics_mv
+
+Revision ID: a3c9e1f27b54
+Revises: 91307b27eb39
+Create Date: 2026-10-16 09:12:04.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e1f27b54'
+down_revision = '91307b27eb39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pre-aggregated admin dashboard metrics, refreshed by the scheduler
+    op.execute("""
+        CREATE MATERIALIZED VIEW admin_business_analytics_mv AS
+        WITH bounds AS (
+            SELECT
+                (now() AT TIME ZONE 'utc') AS now_utc,
+                date_trunc('day', now() AT TIME ZONE 'utc') AS today_start
+        ),
+        user_counts AS (
+            SELECT
+                COUNT(u.id) AS total_users,
+                COUNT(u.id) FILTER (WHERE u.last_login >= b.today_start) AS active_users_today,
+                COUNT(u.id) FILTER (WHERE u.created_at >= b.now_utc - interval '7 days') AS new_users_this_week,
+                COUNT(u.id) FILTER (WHERE u.created_at >= b.now_utc - interval '30 days') AS new_users_this_month,
+                COUNT(u.id) FILTER (WHERE u.subscription_tier = 'free') AS free_tier_users,
+                COUNT(u.id) FILTER (WHERE u.subscription_tier <> 'free') AS premium_users,
+                COUNT(u.id) FILTER (WHERE u.subscription_tier = 'premium_daily') AS daily_subscribers,
+                COUNT(u.id) FILTER (WHERE u.subscription_tier = 'premium_monthly') AS monthly_subscribers,
+                COUNT(u.id) FILTER (WHERE u.subscription_tier = 'premium_yearly') AS yearly_subscribers,
+                COUNT(u.id) FILTER (WHERE u.subscription_tier = 'lifetime') AS lifetime_subscribers
+            FROM users u CROSS JOIN bounds b
+        ),
+        message_counts AS (
+            SELECT
+                COUNT(m.id) FILTER (WHERE m.created_at >= b.now_utc - interval '7 days') AS total_messages_this_week,
+                COUNT(m.id) AS total_messages_this_month
+            FROM chat_messages m CROSS JOIN bounds b
+            WHERE m.created_at >= b.now_utc - interval '30 days'
+        ),
+        session_lengths AS (
+            SELECT EXTRACT(EPOCH FROM (MAX(m.created_at) - MIN(m.created_at))) / 60.0 AS minutes
+            FROM chat_messages m
+            GROUP BY m.session_id
+        )
+        SELECT
+            1 AS id,
+            uc.*,
+            (SELECT COALESCE(SUM(messages_today), 0) FROM usage_tracking) AS total_messages_today,
+            mc.total_messages_this_week,
+            mc.total_messages_this_month,
+            (SELECT COUNT(*) FROM personas) AS total_personas,
+            (SELECT COUNT(*) FROM personas WHERE is_public) AS public_personas,
+            (SELECT COUNT(*) FROM marketplace_personas WHERE status = 'approved') AS marketplace_listings,
+            (SELECT COUNT(*) FROM chat_sessions WHERE status = 'active') AS active_chat_sessions,
+            (SELECT COUNT(*) FROM chat_sessions) AS total_chat_sessions,
+            (SELECT COALESCE(AVG(minutes), 0) FROM session_lengths) AS avg_session_length_minutes,
+            (now() AT TIME ZONE 'utc') AS refreshed_at
+        FROM user_counts uc CROSS JOIN message_counts mc
+    """)
+
+    # REFRESH ... CONCURRENTLY requires a unique index on the view
+    op.create_index('ix_admin_business_analytics_mv_id', 'admin_business_analytics_mv', ['id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_admin_business_analytics_mv_id', table_name='admin_business_analytics_mv')
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS admin_business_analytics_mv")
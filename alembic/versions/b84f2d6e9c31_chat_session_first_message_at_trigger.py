@@ -0,0 +1,109 @@
+"""chat_session_first_message_at_trigger
+
+Revision ID: b84f2d6e9c31
+Revises: e52f9a0c3d17
+Create Date: 2026-10-16 12:05:47.330129
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b84f2d6e9c31'
+down_revision = 'e52f9a0c3d17'
+branch_labels = None
+depends_on = None
+
+
+ANALYTICS_VIEW_SQL = """
+    CREATE MATERIALIZED VIEW admin_business_analytics_mv AS
+    WITH bounds AS (
+        SELECT
+            (now() AT TIME ZONE 'utc') AS now_utc,
+            date_trunc('day', now() AT TIME ZONE 'utc') AS today_start
+    ),
+    user_counts AS (
+        SELECT
+            COUNT(u.id) AS total_users,
+            COUNT(u.id) FILTER (WHERE u.last_login >= b.today_start) AS active_users_today,
+            COUNT(u.id) FILTER (WHERE u.created_at >= b.now_utc - interval '7 days') AS new_users_this_week,
+            COUNT(u.id) FILTER (WHERE u.created_at >= b.now_utc - interval '30 days') AS new_users_this_month,
+            COUNT(u.id) FILTER (WHERE u.subscription_tier = 'free') AS free_tier_users,
+            COUNT(u.id) FILTER (WHERE u.subscription_tier <> 'free') AS premium_users,
+            COUNT(u.id) FILTER (WHERE u.subscription_tier = 'premium_daily') AS daily_subscribers,
+            COUNT(u.id) FILTER (WHERE u.subscription_tier = 'premium_monthly') AS monthly_subscribers,
+            COUNT(u.id) FILTER (WHERE u.subscription_tier = 'premium_yearly') AS yearly_subscribers,
+            COUNT(u.id) FILTER (WHERE u.subscription_tier = 'lifetime') AS lifetime_subscribers
+        FROM users u CROSS JOIN bounds b
+    ),
+    message_counts AS (
+        SELECT
+            COUNT(m.id) FILTER (WHERE m.created_at >= b.now_utc - interval '7 days') AS total_messages_this_week,
+            COUNT(m.id) AS total_messages_this_month
+        FROM chat_messages m CROSS JOIN bounds b
+        WHERE m.created_at >= b.now_utc - interval '30 days'
+    )
+    SELECT
+        1 AS id,
+        uc.*,
+        (SELECT COALESCE(SUM(messages_today), 0) FROM usage_tracking) AS total_messages_today,
+        mc.total_messages_this_week,
+        mc.total_messages_this_month,
+        (SELECT COUNT(*) FROM personas) AS total_personas,
+        (SELECT COUNT(*) FROM personas WHERE is_public) AS public_personas,
+        (SELECT COUNT(*) FROM marketplace_personas WHERE status = 'approved') AS marketplace_listings,
+        (SELECT COUNT(*) FROM chat_sessions WHERE status = 'active') AS active_chat_sessions,
+        (SELECT COUNT(*) FROM chat_sessions) AS total_chat_sessions,
+        {session_length_sql} AS avg_session_length_minutes,
+        (now() AT TIME ZONE 'utc') AS refreshed_at
+    FROM user_counts uc CROSS JOIN message_counts mc
+"""
+
+# Session span read from the trigger-maintained columns on chat_sessions
+SESSION_LENGTH_FROM_SESSIONS = """(
+        SELECT COALESCE(AVG(EXTRACT(EPOCH FROM (last_message_at - first_message_at)) / 60.0), 0)
+        FROM chat_sessions
+        WHERE first_message_at IS NOT NULL
+    )"""
+
+# Original definition: session span aggregated over every chat message
+SESSION_LENGTH_FROM_MESSAGES = """(
+        SELECT COALESCE(AVG(minutes), 0) FROM (
+            SELECT EXTRACT(EPOCH FROM (MAX(m.created_at) - MIN(m.created_at))) / 60.0 AS minutes
+            FROM chat_messages m
+            GROUP BY m.session_id
+        ) session_lengths
+    )"""
+
+
+def _recreate_analytics_view(session_length_sql: str) -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS admin_business_analytics_mv")
+    op.execute(ANALYTICS_VIEW_SQL.format(session_length_sql=session_length_sql))
+    op.create_index('ix_admin_business_analytics_mv_id', 'admin_business_analytics_mv', ['id'], unique=True)
+
+
+def upgrade() -> None:
+    op.add_column('chat_sessions', sa.Column('first_message_at', sa.DateTime(), nullable=True))
+
+    # Backfill the span columns from existing messages
+    op.execute("""
+        UPDATE chat_sessions s
+        SET first_message_at = m.first_at,
+            last_message_at = m.last_at
+        FROM (
+            SELECT session_id, MIN(created_at) AS first_at, MAX(created_at) AS last_at
+            FROM chat_messages
+            GROUP BY session_id
+        ) m
+        WHERE s.id = m.session_id
+    """)
+
+    # From here on send_message keeps the span current in the same UPDATE
+    # that bumps message_count, so each chat turn writes the session row once
+    _recreate_analytics_view(SESSION_LENGTH_FROM_SESSIONS)
+
+
+def downgrade() -> None:
+    _recreate_analytics_view(SESSION_LENGTH_FROM_MESSAGES)
+
+    op.drop_column('chat_sessions', 'first_message_at')
@@ -0,0 +1,42 @@
+"""add_admin_and_chat_composite_indexes
+
+Revision ID: c71d4b8e0a26
+Revises: a3c9e1f27b54
+Create Date: 2026-10-16 10:02:47.553190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c71d4b8e0a26'
+down_revision = 'a3c9e1f27b54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Admin user list: filter by tier/status, sort by newest first
+    op.create_index('ix_users_tier_created', 'users', ['subscription_tier', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_users_active_created', 'users', ['is_active', sa.text('created_at DESC')], unique=False)
+
+    # Chat session lists: pinned first, then most recent, excluding deleted sessions
+    op.create_index(
+        'ix_chat_sessions_user_pinned_last',
+        'chat_sessions',
+        ['user_id', sa.text('is_pinned DESC'), sa.text('last_message_at DESC')],
+        unique=False,
+        postgresql_where=sa.text("status != 'deleted'")
+    )
+    op.create_index('ix_chat_sessions_status_lastmsg', 'chat_sessions', ['status', 'last_message_at'], unique=False)
+
+    # Chat messages: ordered reads within a session
+    op.create_index('ix_chat_messages_session_created', 'chat_messages', ['session_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_session_created', table_name='chat_messages')
+    op.drop_index('ix_chat_sessions_status_lastmsg', table_name='chat_sessions')
+    op.drop_index('ix_chat_sessions_user_pinned_last', table_name='chat_sessions')
+    op.drop_index('ix_users_active_created', table_name='users')
+    op.drop_index('ix_users_tier_created', table_name='users')
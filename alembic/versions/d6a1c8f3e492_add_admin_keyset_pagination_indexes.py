@@ -0,0 +1,41 @@
+"""add_admin_keyset_pagination_indexes
+
+Revision ID: d6a1c8f3e492
+Revises: b84f2d6e9c31
+Create Date: 2026-10-16 12:48:19.661207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd6a1c8f3e492'
+down_revision = 'b84f2d6e9c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Admin user list: unfiltered keyset pages on (created_at, id)
+    op.create_index('ix_users_created_id', 'users', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+
+    # Moderation queue: listings by status, low-rated reviews, both seeking on (created_at, id)
+    op.create_index(
+        'ix_marketplace_personas_status_created_id',
+        'marketplace_personas',
+        ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    op.create_index(
+        'ix_marketplace_reviews_low_rating_created_id',
+        'marketplace_reviews',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('rating <= 2')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_marketplace_reviews_low_rating_created_id', table_name='marketplace_reviews')
+    op.drop_index('ix_marketplace_personas_status_created_id', table_name='marketplace_personas')
+    op.drop_index('ix_users_created_id', table_name='users')
@@ -0,0 +1,29 @@
+"""chat_session_server_timestamps
+
+Revision ID: e52f9a0c3d17
+Revises: c71d4b8e0a26
+Create Date: 2026-10-16 11:20:31.904415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e52f9a0c3d17'
+down_revision = 'c71d4b8e0a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Let the database stamp chat session timestamps, as naive UTC to match
+    # the rest of the schema regardless of the server's TimeZone setting
+    op.alter_column('chat_sessions', 'created_at', server_default=sa.text("timezone('utc', now())"))
+    op.alter_column('chat_sessions', 'last_message_at', server_default=sa.text("timezone('utc', now())"))
+    op.alter_column('chat_sessions', 'updated_at', server_default=sa.text("timezone('utc', now())"))
+
+
+def downgrade() -> None:
+    op.alter_column('chat_sessions', 'updated_at', server_default=None)
+    op.alter_column('chat_sessions', 'last_message_at', server_default=None)
+    op.alter_column('chat_sessions', 'created_at', server_default=None)
@@ -0,0 +1,52 @@
+"""add_chat_sessions_user_status_list_index
+
+Revision ID: f19b7c2d4a68
+Revises: d6a1c8f3e492
+Create Date: 2026-10-16 14:10:52.207413
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f19b7c2d4a68'
+down_revision = 'd6a1c8f3e492'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Session lists filtered by user and status: pinned first, then most recent
+    # (id breaks ties). Replaces ix_chat_sessions_user_pinned_last, which this
+    # index covers. Built concurrently so chat writes aren't blocked on large tables.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chat_sessions_user_status_pinned_last',
+            'chat_sessions',
+            ['user_id', 'status', sa.text('is_pinned DESC'), sa.text('last_message_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text("status != 'deleted'"),
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_chat_sessions_user_pinned_last',
+            table_name='chat_sessions',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chat_sessions_user_pinned_last',
+            'chat_sessions',
+            ['user_id', sa.text('is_pinned DESC'), sa.text('last_message_at DESC')],
+            unique=False,
+            postgresql_where=sa.text("status != 'deleted'"),
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_chat_sessions_user_status_pinned_last',
+            table_name='chat_sessions',
+            postgresql_concurrently=True
+        )
@@ -1,5 +1,6 @@
 """Admin dashboard API endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import status as http_status
 from sqlalchemy.orm import Session
 from typing import Optional
 
@@ -35,6 +36,7 @@ def get_users(
     search: Optional[str] = Query(None, description="Search in email and display_name"),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -46,18 +48,20 @@ def get_users(
     - **search**: Search in email and display_name
     - **page**: Page number (1-indexed)
     - **page_size**: Number of users per page (max 100)
+    - **cursor**: Keyset cursor from the previous response; faster than page for deep pages
 
     Requires admin authentication
     """
     try:
         skip = (page - 1) * page_size
         service = AdminService(db)
-        users, total = service.get_users(
+        users, total, next_cursor = service.get_users(
             status=status,
             subscription_tier=subscription_tier,
             search=search,
             skip=skip,
-            limit=page_size
+            limit=page_size,
+            cursor=cursor
         )
 
         total_pages = (total + page_size - 1) // page_size
@@ -87,12 +91,18 @@ def get_users(
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching users: {str(e)}"
         )
 
@@ -190,6 +200,7 @@ def get_moderation_queue(
     ),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -200,6 +211,7 @@ def get_moderation_queue(
     - **status**: Filter by status (pending, approved, rejected)
     - **page**: Page number (1-indexed)
     - **page_size**: Number of items per page (max 100)
+    - **cursor**: Keyset cursor from the previous response; faster than page for deep pages
 
     Returns content that needs moderation approval
 
@@ -208,23 +220,30 @@ def get_moderation_queue(
     try:
         skip = (page - 1) * page_size
         service = AdminService(db)
-        items, total = service.get_moderation_queue(
+        items, total, next_cursor = service.get_moderation_queue(
             content_type=content_type,
             status=status,
             skip=skip,
-            limit=page_size
+            limit=page_size,
+            cursor=cursor
         )
 
         return ModerationQueueResponse(
             items=items,
             total=total,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_cursor=next_cursor
         )
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching moderation queue: {str(e)}"
         )
 
@@ -1,10 +1,10 @@
 """AI/Gemini API endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import AsyncIterator
-import json
+from sqlalchemy.orm import Session, load_only
+from typing import AsyncIterator, List
 
+from app.config import settings
 from app.database import get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
@@ -22,6 +22,30 @@ from app.schemas.ai import (
 router = APIRouter(prefix="/ai", tags=["AI"])
 
 
+def _recent_messages(db: Session, session_id, user_id) -> List[ChatMessage]:
+    """
+    Get the messages used as conversation context, oldest first
+
+    Only the newest AI_MAX_CONVERSATION_HISTORY messages are read (backwards
+    along the session/created_at index) instead of the whole chat. Access is
+    checked by joining the session in the same query, so a session that
+    doesn't exist or isn't the user's simply yields no context.
+    """
+    messages = db.query(ChatMessage).options(
+        load_only(ChatMessage.sender_type, ChatMessage.text, ChatMessage.created_at)
+    ).join(
+        ChatSession, ChatSession.id == ChatMessage.session_id
+    ).filter(
+        ChatMessage.session_id == session_id,
+        ChatSession.user_id == user_id
+    ).order_by(
+        ChatMessage.created_at.desc()
+    ).limit(settings.AI_MAX_CONVERSATION_HISTORY).all()
+
+    messages.reverse()
+    return messages
+
+
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_response(
     request: GenerateRequest,
@@ -43,16 +67,7 @@ async def generate_response(
         # Get conversation history if session_id provided
         conversation_history = []
         if request.session_id:
-            session = db.query(ChatSession).filter(
-                ChatSession.id == request.session_id,
-                ChatSession.user_id == current_user.id
-            ).first()
-
-            if session:
-                # Get recent messages from this session
-                conversation_history = db.query(ChatMessage).filter(
-                    ChatMessage.session_id == session.id
-                ).order_by(ChatMessage.created_at.asc()).all()
+            conversation_history = _recent_messages(db, request.session_id, current_user.id)
 
         # Generate response
         gemini_service = GeminiService(db)
@@ -117,21 +132,13 @@ async def generate_streaming_response(
         # Get conversation history if session_id provided
         conversation_history = []
         if request.session_id:
-            session = db.query(ChatSession).filter(
-                ChatSession.id == request.session_id,
-                ChatSession.user_id == current_user.id
-            ).first()
-
-            if session:
-                conversation_history = db.query(ChatMessage).filter(
-                    ChatMessage.session_id == session.id
-                ).order_by(ChatMessage.created_at.asc()).all()
+            conversation_history = _recent_messages(db, request.session_id, current_user.id)
 
         # Generate streaming response
         gemini_service = GeminiService(db)
 
-        async def event_stream() -> AsyncIterator[str]:
-            """Stream Server-Sent Events"""
+        async def event_stream() -> AsyncIterator[bytes]:
+            """Stream Server-Sent Events (as bytes, so nothing is re-encoded)"""
             async for chunk in gemini_service.generate_streaming_response(
                 user_id=str(current_user.id),
                 persona_id=request.persona_id,
@@ -140,7 +147,7 @@ async def generate_streaming_response(
                 temperature=request.temperature
             ):
                 # Format as SSE
-                yield f"data: {chunk}\n\n"
+                yield b"data: " + chunk + b"\n\n"
 
         return StreamingResponse(
             event_stream(),
@@ -1,6 +1,7 @@
 """Chat API endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import JSONResponse
+from fastapi import status as http_status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 
@@ -86,26 +87,29 @@ def get_chat_sessions(
     status: Optional[str] = Query(None, pattern="^(active|archived|deleted)$"),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get all chat sessions for the current user
 
-    - **status**: Optional filter by status (active, archived, deleted)
+    - **status**: Optional filter by status (active, archived, deleted); deleted sessions are only returned when requested
     - **page**: Page number (1-indexed)
     - **page_size**: Number of sessions per page (max 100)
+    - **cursor**: Keyset cursor from the previous response; faster than page for deep pages
 
     Sessions are ordered by pinned status and last message time
     """
     try:
         skip = (page - 1) * page_size
         service = ChatService(db)
-        sessions, total = service.get_user_sessions(
+        sessions, total, next_cursor = service.get_user_sessions(
             user_id=str(current_user.id),
             status=status,
             skip=skip,
-            limit=page_size
+            limit=page_size,
+            cursor=cursor
         )
 
         enriched_sessions = [_enrich_session(s, db) for s in sessions]
@@ -114,12 +118,18 @@ def get_chat_sessions(
             sessions=[ChatSessionResponse.model_validate(s) for s in enriched_sessions],
             total=total,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_cursor=next_cursor
         )
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching chat sessions: {str(e)}"
         )
 
@@ -171,6 +181,7 @@ def search_sessions(
     sort_order: SortOrder = Query(SortOrder.desc, description="Sort order"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -185,6 +196,7 @@ def search_sessions(
     - **end_date**: Filter sessions created before this date
     - **sort_by**: Sort field (last_message_at, created_at, message_count, persona_name)
     - **sort_order**: Sort direction (asc/desc)
+    - **cursor**: Keyset cursor from the previous response (must use the same sort)
 
     Pinned sessions always appear first regardless of sort order
     """
@@ -192,7 +204,7 @@ def search_sessions(
         skip = (page - 1) * page_size
         service = ChatService(db)
 
-        sessions, total, filters_applied = service.search_sessions(
+        sessions, total, filters_applied, next_cursor = service.search_sessions(
             user_id=str(current_user.id),
             query=q,
             persona_id=persona_id,
@@ -203,7 +215,8 @@ def search_sessions(
             sort_by=sort_by.value,
             sort_order=sort_order.value,
             skip=skip,
-            limit=page_size
+            limit=page_size,
+            cursor=cursor
         )
 
         enriched_sessions = [_enrich_session(s, db) for s in sessions]
@@ -214,9 +227,15 @@ def search_sessions(
             page=page,
             page_size=page_size,
             query=q,
-            filters_applied=filters_applied
+            filters_applied=filters_applied,
+            next_cursor=next_cursor
         )
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -417,11 +436,11 @@ async def export_chat_session(
     - **include_timestamps**: Include timestamps in export
     - **include_metadata**: Include session metadata
 
-    Returns the chat in the requested format
+    Returns the chat in the requested format, streamed as a JSON document
     """
     try:
         service = ChatService(db)
-        export_result = service.export_session(
+        export_stream = service.export_session(
             session_id=session_id,
             user_id=str(current_user.id),
             format=export_data.format,
@@ -429,7 +448,7 @@ async def export_chat_session(
             include_metadata=export_data.include_metadata
         )
 
-        return JSONResponse(content=export_result)
+        return StreamingResponse(export_stream, media_type="application/json")
 
     except ValueError as e:
         raise HTTPException(
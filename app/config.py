@@ -48,6 +48,7 @@ class Settings(BaseSettings):
     FIREBASE_AUTH_ENABLED: bool = True
     GOOGLE_WEB_CLIENT_ID: str
     FCM_CREDENTIALS_PATH: str = "firebase-admin-sdk.json"
+    FCM_TOKEN_CACHE_TTL_SECONDS: int = 60  # Redis TTL for a user's active FCM tokens
 
     # Google Gemini AI (legacy - kept for reference)
     GEMINI_API_KEY: str = ""
@@ -95,6 +96,9 @@ class Settings(BaseSettings):
     AI_DEFAULT_TEMPERATURE: float = 0.7  # Lower temp = more focused, less verbose responses
     AI_MAX_CONVERSATION_HISTORY: int = 20  # Max messages to include in context
 
+    # Chat
+    CHAT_STATISTICS_CACHE_TTL_SECONDS: int = 60  # Redis TTL for per-user chat statistics
+
     # Subscription Settings
     GRACE_PERIOD_DAYS: int = 3
 
@@ -102,6 +106,14 @@ class Settings(BaseSettings):
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
     ADMIN_JWT_EXPIRE_MINUTES: int = 60
+    ADMIN_ANALYTICS_USE_MATERIALIZED_VIEW: bool = True  # Read dashboard metrics from admin_business_analytics_mv
+    ADMIN_ANALYTICS_REFRESH_MINUTES: int = 5  # How often the scheduler refreshes the analytics view
+    ADMIN_ANALYTICS_CACHE_TTL_SECONDS: int = 120  # Redis TTL for the analytics dashboard payload
+    HEALTH_CHECK_TIMEOUT_MS: int = 500  # statement_timeout for the admin database health probe
+
+    # Redis (optional - caching is skipped when REDIS_URL is empty)
+    REDIS_URL: str = ""
+    REDIS_SOCKET_TIMEOUT: float = 1.0
 
     # Server
     HOST: str = "0.0.0.0"
@@ -0,0 +1,36 @@
+"""
+Redis cache client
+"""
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+_redis_unavailable = False
+
+
+def get_redis():
+    """
+    Get the shared Redis client (lazy loading)
+
+    Returns None when REDIS_URL is not configured or the redis package is
+    not installed, so callers can simply skip caching.
+    """
+    global _redis_client, _redis_unavailable
+
+    if _redis_client is None and not _redis_unavailable and settings.REDIS_URL:
+        try:
+            import redis
+
+            _redis_client = redis.Redis.from_url(
+                settings.REDIS_URL,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT
+            )
+            logger.info("Redis client initialized")
+        except ImportError:
+            _redis_unavailable = True
+            logger.error("redis package not installed. Run: pip install redis")
+
+    return _redis_client
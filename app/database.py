@@ -37,6 +37,21 @@ def get_db():
         db.close()
 
 
+def commit_keep_loaded(db):
+    """
+    Commit without expiring loaded instances
+
+    Use when the objects being returned were fully populated by the flush
+    (or by UPDATE ... RETURNING), so reading them after the commit does not
+    need a follow-up SELECT.
+    """
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = True
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
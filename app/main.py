@@ -188,6 +188,14 @@ async def shutdown_event():
     from app.scheduler import stop_scheduler
     stop_scheduler()
 
+    # Close pooled connections to FileRunner
+    from app.services.filerunner_service import filerunner_service
+    await filerunner_service.close()
+
+    # Close pooled connections to Gemini / Freeway
+    from app.services.gemini_service import close_http_client
+    await close_http_client()
+
 
 # Health check endpoint
 @app.get("/health")
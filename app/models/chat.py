@@ -1,5 +1,5 @@
 """Chat models"""
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text, Index, text, func
 from sqlalchemy.dialects.postgresql import UUID, JSON
 from sqlalchemy.orm import relationship
 import uuid
@@ -31,16 +31,37 @@ class ChatSession(Base):
     message_count = Column(Integer, default=0, nullable=False)
     meta_data = Column(JSON, nullable=True)  # Custom metadata (renamed to avoid SQLAlchemy conflict)
 
-    # Timestamps
-    created_at = Column(DateTime, default=utc_now, nullable=False)
-    last_message_at = Column(DateTime, default=utc_now, nullable=False)
-    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
+    # Timestamps (set by the database so they follow the INSERT/UPDATE itself;
+    # naive UTC like every other timestamp, whatever the server's TimeZone)
+    created_at = Column(DateTime, server_default=func.timezone('utc', func.now()), nullable=False)
+    # first/last_message_at are kept current by send_message's session UPDATE
+    first_message_at = Column(DateTime, nullable=True)
+    last_message_at = Column(DateTime, server_default=func.timezone('utc', func.now()), nullable=False)
+    updated_at = Column(
+        DateTime,
+        server_default=func.timezone('utc', func.now()),
+        onupdate=func.timezone('utc', func.now()),
+        nullable=False
+    )
 
     # Relationships
     user = relationship("User", back_populates="chat_sessions")
     persona = relationship("Persona", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan")
 
+    # Composite indexes for session lists and cleanup scans
+    __table_args__ = (
+        Index("ix_chat_sessions_status_lastmsg", status, last_message_at),
+        Index(
+            "ix_chat_sessions_user_status_pinned_last",
+            user_id, status, is_pinned.desc(), last_message_at.desc(), id.desc(),
+            postgresql_where=text("status != 'deleted'")
+        ),
+    )
+
+    # Fetch server-generated timestamps via RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return f"<ChatSession(id={self.id}, user_id={self.user_id}, persona={self.persona_name})>"
 
@@ -74,6 +95,14 @@ class ChatMessage(Base):
     session = relationship("ChatSession", back_populates="messages")
     attachments = relationship("MessageAttachment", back_populates="message", cascade="all, delete-orphan")
 
+    # Composite index for ordered per-session message reads
+    __table_args__ = (
+        Index("ix_chat_messages_session_created", session_id, created_at),
+    )
+
+    # Fetch server-generated column values via INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return f"<ChatMessage(id={self.id}, session_id={self.session_id}, type={self.sender_type})>"
 
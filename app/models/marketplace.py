@@ -1,5 +1,5 @@
 """Marketplace models"""
-from sqlalchemy import Column, String, Numeric, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Numeric, Integer, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -39,9 +39,15 @@ class MarketplacePersona(Base):
 
     # Relationships
     persona = relationship("Persona", back_populates="marketplace_listing")
+    seller = relationship("User", foreign_keys=[seller_id])
     purchases = relationship("MarketplacePurchase", back_populates="marketplace_persona", cascade="all, delete-orphan")
     reviews = relationship("MarketplaceReview", back_populates="marketplace_persona", cascade="all, delete-orphan")
 
+    # Keyset pagination of the admin moderation queue
+    __table_args__ = (
+        Index("ix_marketplace_personas_status_created_id", status, created_at.desc(), id.desc()),
+    )
+
     def __repr__(self):
         return f"<MarketplacePersona(id={self.id}, title={self.title}, price={self.price})>"
 
@@ -89,6 +95,16 @@ class MarketplaceReview(Base):
 
     # Relationships
     marketplace_persona = relationship("MarketplacePersona", back_populates="reviews")
+    reviewer = relationship("User", foreign_keys=[reviewer_id])
+
+    # Keyset pagination of low-rated reviews in the admin moderation queue
+    __table_args__ = (
+        Index(
+            "ix_marketplace_reviews_low_rating_created_id",
+            created_at.desc(), id.desc(),
+            postgresql_where=text("rating <= 2")
+        ),
+    )
 
     def __repr__(self):
         return f"<MarketplaceReview(id={self.id}, rating={self.rating})>"
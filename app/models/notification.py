@@ -1,5 +1,5 @@
 """Notification models (FCM)"""
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -32,5 +32,16 @@ class FCMToken(Base):
     # Relationships
     user = relationship("User", back_populates="fcm_tokens")
 
+    __table_args__ = (
+        # Active tokens only (notification sends, token listing); inactive
+        # tokens never appear in these queries, so they stay out of the index.
+        # Queries filter with is_active == True rather than is_(True): it
+        # renders as is_active = true, the same clause as the predicate, so
+        # the planner can always prove the partial index applies
+        Index("ix_fcm_tokens_active_user", user_id, postgresql_where=text("is_active = true")),
+        # One token per device of a user (register_token upserts against it)
+        Index("ix_fcm_tokens_user_device", user_id, device_id, unique=True),
+    )
+
     def __repr__(self):
         return f"<FCMToken(id={self.id}, user_id={self.user_id}, device={self.device_id})>"
@@ -1,5 +1,5 @@
 """User model"""
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import timedelta
@@ -50,6 +50,13 @@ class User(Base):
     uploaded_files = relationship("UploadedFile", back_populates="user", cascade="all, delete-orphan")
     marketplace_purchases = relationship("MarketplacePurchase", back_populates="buyer", cascade="all, delete-orphan")
 
+    # Composite indexes for admin list filters and keyset pages sorted by signup date
+    __table_args__ = (
+        Index("ix_users_tier_created", subscription_tier, created_at.desc()),
+        Index("ix_users_active_created", is_active, created_at.desc()),
+        Index("ix_users_created_id", created_at.desc(), id.desc()),
+    )
+
     # Valid paid subscription tiers
     PAID_TIERS = ["basic", "premium", "pro"]
 
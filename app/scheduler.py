@@ -144,3 +144,29 @@ async def check_subscription_expirations():
 
     except Exception as e:
         logger.error(f"❌ Error checking subscription expirations: {e}")
+
+
+@scheduler.scheduled_job('interval', minutes=settings.ADMIN_ANALYTICS_REFRESH_MINUTES)
+async def refresh_admin_analytics_view():
+    """
+    Refresh the admin business analytics materialized view
+    Runs every ADMIN_ANALYTICS_REFRESH_MINUTES minutes
+    """
+    if not settings.ADMIN_ANALYTICS_USE_MATERIALIZED_VIEW:
+        return
+
+    try:
+        from app.database import SessionLocal
+        from app.services.admin_service import AdminService
+
+        db = SessionLocal()
+
+        try:
+            AdminService(db).refresh_analytics_view()
+        finally:
+            db.close()
+
+        logger.info("✅ Admin analytics view refreshed")
+
+    except Exception as e:
+        logger.error(f"❌ Error refreshing admin analytics view: {e}")
@@ -30,6 +30,7 @@ class UserListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page by keyset
 
 
 class UpdateUserStatusRequest(BaseModel):
@@ -107,6 +108,7 @@ class ModerationQueueResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page by keyset
 
 
 class ModerateContentRequest(BaseModel):
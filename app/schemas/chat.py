@@ -92,6 +92,7 @@ class ChatSessionListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page by keyset
 
 
 class ChatExportRequest(BaseModel):
@@ -190,3 +191,4 @@ class ChatSessionSearchResponse(BaseModel):
     page_size: int
     query: Optional[str] = None
     filters_applied: dict = {}
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page by keyset
@@ -1,11 +1,18 @@
 """Admin dashboard service"""
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, or_
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import timedelta
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, desc, and_, or_, case, text, update, tuple_, literal, cast, String
+from typing import List, Dict, Any, Optional, Tuple, Mapping, Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from decimal import Decimal
+import base64
+import json
 import logging
+import uuid
 
+from app.config import settings
+from app.core.cache import get_redis
+from app.database import SessionLocal, commit_keep_loaded
 from app.utils.time_utils import utc_now
 
 from app.models.user import User, UsageTracking
@@ -16,12 +23,63 @@ from app.models.subscription import SubscriptionEvent
 
 logger = logging.getLogger(__name__)
 
+# Materialized view backing the admin analytics dashboard
+ANALYTICS_VIEW = "admin_business_analytics_mv"
+
+# Redis key for the cached analytics dashboard payload
+ANALYTICS_CACHE_KEY = "admin:analytics:v1"
+
+# Subscription prices used for revenue estimates
+DAILY_PRICE = Decimal("0.99")
+MONTHLY_PRICE = Decimal("9.99")
+YEARLY_PRICE = Decimal("59.99")
+LIFETIME_PRICE = Decimal("149.99")
+CENT = Decimal("0.01")
+
+# Worker threads (and so extra pooled connections) shared by all live
+# analytics computations, however many cache misses run at once
+ANALYTICS_QUERY_WORKERS = 2
+_analytics_executor = ThreadPoolExecutor(
+    max_workers=ANALYTICS_QUERY_WORKERS, thread_name_prefix="admin-analytics"
+)
+
+
+def _encode_cursor(positions: Dict[str, Optional[Tuple[datetime, Any]]]) -> Optional[str]:
+    """
+    Encode per-source keyset positions into an opaque pagination cursor
+
+    Each position is the (created_at, id) of the last row returned for that
+    source, or None once the source is exhausted. Returns None when every
+    source is exhausted (there is no next page).
+    """
+    if all(position is None for position in positions.values()):
+        return None
+
+    payload = {
+        source: [position[0].isoformat(), str(position[1])] if position else None
+        for source, position in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Optional[Tuple[datetime, uuid.UUID]]]:
+    """Decode a cursor produced by _encode_cursor"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {
+            source: (datetime.fromisoformat(position[0]), uuid.UUID(position[1])) if position else None
+            for source, position in payload.items()
+        }
+    except (ValueError, TypeError, AttributeError, IndexError):
+        raise ValueError("Invalid cursor")
+
 
 class AdminService:
     """Service for admin dashboard operations"""
 
     def __init__(self, db: Session):
         self.db = db
+        self.cache = get_redis()
 
     def get_users(
         self,
@@ -29,8 +87,9 @@ class AdminService:
         subscription_tier: Optional[str] = None,
         search: Optional[str] = None,
         skip: int = 0,
-        limit: int = 50
-    ) -> Tuple[List[User], int]:
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], int, Optional[str]]:
         """
         Get users with filters
 
@@ -38,12 +97,15 @@ class AdminService:
             status: Filter by status (active, inactive)
             subscription_tier: Filter by subscription tier
             search: Search in email and display_name
-            skip: Records to skip
+            skip: Records to skip (ignored when a cursor is given)
             limit: Max records to return
+            cursor: Keyset cursor from a previous page's next_cursor
 
         Returns:
-            Tuple of (users list, total count)
+            Tuple of (users list, total count, next cursor)
         """
+        positions = _decode_cursor(cursor) if cursor else None
+
         query = self.db.query(User)
 
         # Apply filters
@@ -64,13 +126,101 @@ class AdminService:
                 )
             )
 
-        # Get total count
-        total = query.count()
+        # The unfiltered list is the common case; its total is read from the
+        # planner's row estimate instead of counting the whole table
+        known_total = None
+        if not (status or subscription_tier or search):
+            known_total = self._estimate_row_count(User.__tablename__)
+
+        # Apply sorting and pagination (total comes back with the page)
+        users, total, position = self._fetch_page(
+            query, User.created_at, User.id, skip, limit, positions, "users", known_total
+        )
+
+        return users, total, _encode_cursor({"users": position})
+
+    def _estimate_row_count(self, table_name: str) -> Optional[int]:
+        """
+        Approximate row count of a table from pg_class statistics
+
+        Returns:
+            Estimated row count, or None if the table has not been analyzed yet
+        """
+        estimate = self.db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {"table_name": table_name}
+        ).scalar()
+
+        # reltuples is -1 (or 0 on older servers) until the first VACUUM/ANALYZE
+        return estimate if estimate and estimate > 0 else None
+
+    def _fetch_page(
+        self,
+        query,
+        created_col,
+        id_col,
+        skip: int,
+        limit: int,
+        positions: Optional[Dict[str, Any]] = None,
+        source: str = "items",
+        known_total: Optional[int] = None
+    ) -> Tuple[List[Any], int, Optional[Tuple[datetime, Any]]]:
+        """
+        Fetch one page of an ORM query, newest first, with its total row count
+
+        Rows are ordered by (created_at, id) descending. Without cursor
+        positions the page is read by OFFSET and the total comes from a
+        COUNT(*) OVER () column on the page query itself (a separate count is
+        only issued for an empty page past the first one). With positions,
+        the page seeks past the source's last (created_at, id) instead, so
+        deep pages cost the same as the first. Passing known_total skips the
+        count entirely.
+
+        The query may select a single entity or labelled columns; column
+        queries must label their key columns "created_at" and "id".
+
+        Returns:
+            Tuple of (entities or rows, total count, position of the last row
+            or None when the source is exhausted)
+        """
+        order_by = (desc(created_col), desc(id_col))
+        single_entity = len(query.column_descriptions) == 1
+
+        if positions is not None and source in positions and positions[source] is None:
+            # Exhausted on an earlier page
+            return [], (known_total if known_total is not None else query.count()), None
+
+        if positions is None and known_total is None:
+            rows = query.add_columns(
+                func.count().over().label("total_count")
+            ).order_by(*order_by).offset(skip).limit(limit).all()
+
+            # Unwrap single-entity rows; column rows keep the extra total_count
+            entities = [row[0] for row in rows] if single_entity else rows
+            total = rows[0].total_count if rows else (query.count() if skip else 0)
+        else:
+            page_query = query
+            after = positions.get(source) if positions is not None else None
+            if after is not None:
+                page_query = page_query.filter(
+                    tuple_(created_col, id_col) < tuple_(
+                        literal(after[0], created_col.type),
+                        literal(after[1], id_col.type)
+                    )
+                )
+
+            page_query = page_query.order_by(*order_by)
+            if positions is None:
+                page_query = page_query.offset(skip)
+
+            entities = page_query.limit(limit).all()
+            total = known_total if known_total is not None else query.count()
 
-        # Apply sorting and pagination
-        users = query.order_by(desc(User.created_at)).offset(skip).limit(limit).all()
+        if len(entities) < limit:
+            return entities, total, None
 
-        return users, total
+        last = entities[-1]
+        return entities, total, (getattr(last, created_col.key), getattr(last, id_col.key))
 
     def update_user_status(
         self,
@@ -92,20 +242,23 @@ class AdminService:
         Raises:
             ValueError: If user not found or invalid action
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
-
-        if not user:
-            raise ValueError("User not found")
-
         if action == "activate":
-            user.is_active = True
+            is_active = True
         elif action in ["suspend", "ban"]:
-            user.is_active = False
+            is_active = False
         else:
             raise ValueError(f"Invalid action: {action}")
 
-        self.db.commit()
-        self.db.refresh(user)
+        # Update and load the user in a single UPDATE ... RETURNING
+        user = self.db.execute(
+            update(User).where(User.id == user_id).values(is_active=is_active).returning(User)
+        ).scalar_one_or_none()
+
+        if not user:
+            raise ValueError("User not found")
+
+        commit_keep_loaded(self.db)
+        self._invalidate_analytics_cache()
 
         logger.info(f"User {user_id} status updated: {action}" + (f" - Reason: {reason}" if reason else ""))
 
@@ -115,140 +268,255 @@ class AdminService:
         """
         Get comprehensive business analytics
 
+        Reads the pre-aggregated materialized view when enabled, falling back
+        to computing the metrics live if the view is missing or empty.
+
         Returns:
             Dictionary with analytics data
         """
-        now = utc_now()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-        today_start = datetime(now.year, now.month, now.day)
+        cached = self._get_cached_analytics()
+        if cached is not None:
+            return cached
+
+        analytics = None
+        if settings.ADMIN_ANALYTICS_USE_MATERIALIZED_VIEW:
+            try:
+                row = self.db.execute(
+                    text(f"SELECT * FROM {ANALYTICS_VIEW} LIMIT 1")
+                ).mappings().first()
+                if row:
+                    analytics = self._build_business_analytics(row)
+                else:
+                    logger.warning(f"{ANALYTICS_VIEW} is empty, computing analytics live")
+            except Exception as e:
+                self.db.rollback()
+                logger.warning(f"Could not read {ANALYTICS_VIEW}, computing analytics live: {str(e)}")
+
+        if analytics is None:
+            analytics = self._build_business_analytics(self._compute_analytics_counts())
+
+        self._cache_analytics(analytics)
+        return analytics
+
+    def _get_cached_analytics(self) -> Optional[Dict[str, Any]]:
+        """Return the cached analytics payload, or None on miss or cache error"""
+        if self.cache is None:
+            return None
 
-        # User metrics
-        total_users = self.db.query(func.count(User.id)).scalar()
+        try:
+            cached = self.cache.get(ANALYTICS_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Analytics cache read failed: {str(e)}")
+            return None
 
-        active_users_today = self.db.query(func.count(User.id)).filter(
-            User.last_login >= today_start
-        ).scalar()
+        return json.loads(cached) if cached else None
 
-        new_users_this_week = self.db.query(func.count(User.id)).filter(
-            User.created_at >= week_ago
-        ).scalar()
+    def _cache_analytics(self, analytics: Dict[str, Any]):
+        """Store the analytics payload with a short TTL"""
+        if self.cache is None:
+            return
 
-        new_users_this_month = self.db.query(func.count(User.id)).filter(
-            User.created_at >= month_ago
-        ).scalar()
-
-        # Subscription metrics
-        free_tier_users = self.db.query(func.count(User.id)).filter(
-            User.subscription_tier == "free"
-        ).scalar()
-
-        premium_users = self.db.query(func.count(User.id)).filter(
-            User.subscription_tier != "free"
-        ).scalar()
+        try:
+            self.cache.set(
+                ANALYTICS_CACHE_KEY,
+                json.dumps(analytics, default=str),
+                ex=settings.ADMIN_ANALYTICS_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Analytics cache write failed: {str(e)}")
 
-        daily_subscribers = self.db.query(func.count(User.id)).filter(
-            User.subscription_tier == "premium_daily"
-        ).scalar()
+    def _invalidate_analytics_cache(self):
+        """Drop the cached analytics payload after an admin change"""
+        if self.cache is None:
+            return
 
-        monthly_subscribers = self.db.query(func.count(User.id)).filter(
-            User.subscription_tier == "premium_monthly"
-        ).scalar()
-
-        yearly_subscribers = self.db.query(func.count(User.id)).filter(
-            User.subscription_tier == "premium_yearly"
-        ).scalar()
+        try:
+            self.cache.delete(ANALYTICS_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Analytics cache invalidation failed: {str(e)}")
 
-        lifetime_subscribers = self.db.query(func.count(User.id)).filter(
-            User.subscription_tier == "lifetime"
-        ).scalar()
+    def refresh_analytics_view(self):
+        """Refresh the business analytics materialized view without blocking readers"""
+        self.db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {ANALYTICS_VIEW}"))
+        self.db.commit()
 
-        # Revenue metrics (estimated)
-        monthly_recurring_revenue = Decimal(
-            (daily_subscribers * 0.99 * 30) +
-            (monthly_subscribers * 9.99) +
-            (yearly_subscribers * 59.99 / 12)
-        )
+    def _compute_analytics_counts(self) -> Dict[str, Any]:
+        """
+        Compute the raw analytics counts directly from the source tables
 
-        total_lifetime_revenue = Decimal(
-            (lifetime_subscribers * 149.99) +
-            (monthly_recurring_revenue * 12)  # Estimated annual from recurring
+        Returns:
+            Dictionary with the same columns as the analytics materialized view
+        """
+        now = utc_now()
+        week_ago = now - timedelta(days=7)
+        month_ago = now - timedelta(days=30)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # The aggregates below are independent, so each runs on its own pooled
+        # connection and the total latency is that of the slowest one
+        def user_metrics(db: Session):
+            # User and subscription metrics (single conditional aggregate)
+            return db.query(
+                func.count(User.id).label("total"),
+                func.count(case((User.last_login >= today_start, 1))).label("active_today"),
+                func.count(case((User.created_at >= week_ago, 1))).label("new_week"),
+                func.count(case((User.created_at >= month_ago, 1))).label("new_month"),
+                func.count(case((User.subscription_tier == "free", 1))).label("free"),
+                func.count(case((User.subscription_tier != "free", 1))).label("premium"),
+                func.count(case((User.subscription_tier == "premium_daily", 1))).label("daily"),
+                func.count(case((User.subscription_tier == "premium_monthly", 1))).label("monthly"),
+                func.count(case((User.subscription_tier == "premium_yearly", 1))).label("yearly"),
+                func.count(case((User.subscription_tier == "lifetime", 1))).label("lifetime")
+            ).one()
+
+        def usage_metrics(db: Session):
+            return db.query(func.sum(UsageTracking.messages_today)).scalar() or 0
+
+        def message_metrics(db: Session):
+            # Weekly count is a subset of the monthly scan
+            return db.query(
+                func.count(case((ChatMessage.created_at >= week_ago, 1))).label("week"),
+                func.count(ChatMessage.id).label("month")
+            ).filter(ChatMessage.created_at >= month_ago).one()
+
+        def content_metrics(db: Session):
+            persona_counts = db.query(
+                func.count(Persona.id).label("total"),
+                func.count(case((Persona.is_public == True, 1))).label("public")
+            ).one()
+            marketplace_listings = db.query(func.count(MarketplacePersona.id)).filter(
+                MarketplacePersona.status == "approved"
+            ).scalar()
+            return persona_counts, marketplace_listings
+
+        def engagement_metrics(db: Session):
+            # Average session length comes from the first/last_message_at
+            # span kept on chat_sessions; sessions without messages have a
+            # NULL span and are ignored by AVG
+            return db.query(
+                func.count(ChatSession.id).label("total"),
+                func.count(case((ChatSession.status == "active", 1))).label("active"),
+                func.coalesce(
+                    func.avg(
+                        func.extract(
+                            "epoch",
+                            ChatSession.last_message_at - ChatSession.first_message_at
+                        ) / 60.0
+                    ),
+                    0.0
+                ).label("avg_length_minutes")
+            ).one()
+
+        (
+            user_counts,
+            total_messages_today,
+            message_counts,
+            (persona_counts, marketplace_listings),
+            session_counts
+        ) = self._run_concurrently(
+            user_metrics, usage_metrics, message_metrics, content_metrics, engagement_metrics
         )
 
-        # Usage metrics
-        total_messages_today = self.db.query(
-            func.sum(UsageTracking.messages_today)
-        ).scalar() or 0
-
-        total_messages_this_week = self.db.query(
-            func.count(ChatMessage.id)
-        ).filter(ChatMessage.created_at >= week_ago).scalar() or 0
-
-        total_messages_this_month = self.db.query(
-            func.count(ChatMessage.id)
-        ).filter(ChatMessage.created_at >= month_ago).scalar() or 0
+        return {
+            "total_users": user_counts.total,
+            "active_users_today": user_counts.active_today,
+            "new_users_this_week": user_counts.new_week,
+            "new_users_this_month": user_counts.new_month,
+            "free_tier_users": user_counts.free,
+            "premium_users": user_counts.premium,
+            "daily_subscribers": user_counts.daily,
+            "monthly_subscribers": user_counts.monthly,
+            "yearly_subscribers": user_counts.yearly,
+            "lifetime_subscribers": user_counts.lifetime,
+            "total_messages_today": total_messages_today,
+            "total_messages_this_week": message_counts.week,
+            "total_messages_this_month": message_counts.month,
+            "total_personas": persona_counts.total,
+            "public_personas": persona_counts.public,
+            "marketplace_listings": marketplace_listings,
+            "active_chat_sessions": session_counts.active,
+            "total_chat_sessions": session_counts.total,
+            "avg_session_length_minutes": session_counts.avg_length_minutes
+        }
 
-        avg_messages_per_user = (
-            total_messages_this_month / total_users
-        ) if total_users > 0 else 0.0
+    @staticmethod
+    def _run_concurrently(*queries: Callable[[Session], Any]) -> List[Any]:
+        """
+        Run independent read-only queries in parallel
 
-        # Content metrics
-        total_personas = self.db.query(func.count(Persona.id)).scalar()
+        Each query gets its own session (and so its own pooled connection),
+        since a Session must not be shared across threads. The queries share
+        a fixed pool of ANALYTICS_QUERY_WORKERS threads, which bounds the
+        extra connections taken from the request pool.
 
-        public_personas = self.db.query(func.count(Persona.id)).filter(
-            Persona.is_public == True
-        ).scalar()
+        Returns:
+            Query results in the order the queries were given
+        """
+        def run(query: Callable[[Session], Any]) -> Any:
+            db = SessionLocal()
+            try:
+                return query(db)
+            finally:
+                db.close()
 
-        marketplace_listings = self.db.query(func.count(MarketplacePersona.id)).filter(
-            MarketplacePersona.status == "approved"
-        ).scalar()
+        return list(_analytics_executor.map(run, queries))
 
-        # Engagement metrics
-        active_chat_sessions = self.db.query(func.count(ChatSession.id)).filter(
-            ChatSession.status == "active"
-        ).scalar()
+    def _build_business_analytics(self, counts: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Derive revenue and average metrics from raw analytics counts
 
-        total_chat_sessions = self.db.query(func.count(ChatSession.id)).scalar()
+        Args:
+            counts: Raw counts (materialized view row or live computation)
 
-        # Calculate average session length
-        sessions_with_messages = self.db.query(
-            ChatSession.id,
-            func.min(ChatMessage.created_at).label('first_message'),
-            func.max(ChatMessage.created_at).label('last_message')
-        ).join(ChatMessage).group_by(ChatSession.id).all()
+        Returns:
+            Dictionary with analytics data
+        """
+        total_users = counts["total_users"]
+        daily_subscribers = counts["daily_subscribers"]
+        monthly_subscribers = counts["monthly_subscribers"]
+        yearly_subscribers = counts["yearly_subscribers"]
+        lifetime_subscribers = counts["lifetime_subscribers"]
+        total_messages_this_month = counts["total_messages_this_month"]
+
+        # Revenue metrics (estimated, exact Decimal arithmetic)
+        monthly_recurring_revenue = (
+            DAILY_PRICE * daily_subscribers * 30 +
+            MONTHLY_PRICE * monthly_subscribers +
+            YEARLY_PRICE * yearly_subscribers / 12
+        ).quantize(CENT)
+
+        total_lifetime_revenue = (
+            LIFETIME_PRICE * lifetime_subscribers +
+            monthly_recurring_revenue * 12  # Estimated annual from recurring
+        ).quantize(CENT)
 
-        if sessions_with_messages:
-            total_minutes = sum(
-                (session.last_message - session.first_message).total_seconds() / 60
-                for session in sessions_with_messages
-            )
-            avg_session_length_minutes = total_minutes / len(sessions_with_messages)
-        else:
-            avg_session_length_minutes = 0.0
+        avg_messages_per_user = (
+            total_messages_this_month / total_users
+        ) if total_users > 0 else 0.0
 
         return {
             "total_users": total_users,
-            "active_users_today": active_users_today,
-            "new_users_this_week": new_users_this_week,
-            "new_users_this_month": new_users_this_month,
-            "free_tier_users": free_tier_users,
-            "premium_users": premium_users,
+            "active_users_today": counts["active_users_today"],
+            "new_users_this_week": counts["new_users_this_week"],
+            "new_users_this_month": counts["new_users_this_month"],
+            "free_tier_users": counts["free_tier_users"],
+            "premium_users": counts["premium_users"],
             "daily_subscribers": daily_subscribers,
             "monthly_subscribers": monthly_subscribers,
             "yearly_subscribers": yearly_subscribers,
             "lifetime_subscribers": lifetime_subscribers,
             "monthly_recurring_revenue": monthly_recurring_revenue,
             "total_lifetime_revenue": total_lifetime_revenue,
-            "total_messages_today": total_messages_today,
-            "total_messages_this_week": total_messages_this_week,
+            "total_messages_today": counts["total_messages_today"],
+            "total_messages_this_week": counts["total_messages_this_week"],
             "total_messages_this_month": total_messages_this_month,
             "avg_messages_per_user": round(avg_messages_per_user, 2),
-            "total_personas": total_personas,
-            "public_personas": public_personas,
-            "marketplace_listings": marketplace_listings,
-            "active_chat_sessions": active_chat_sessions,
-            "total_chat_sessions": total_chat_sessions,
-            "avg_session_length_minutes": round(avg_session_length_minutes, 2)
+            "total_personas": counts["total_personas"],
+            "public_personas": counts["public_personas"],
+            "marketplace_listings": counts["marketplace_listings"],
+            "active_chat_sessions": counts["active_chat_sessions"],
+            "total_chat_sessions": counts["total_chat_sessions"],
+            "avg_session_length_minutes": round(float(counts["avg_session_length_minutes"]), 2)
         }
 
     def get_moderation_queue(
@@ -256,68 +524,111 @@ class AdminService:
         content_type: Optional[str] = None,
         status: str = "pending",
         skip: int = 0,
-        limit: int = 50
-    ) -> Tuple[List[Dict[str, Any]], int]:
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
         """
         Get content moderation queue
 
         Args:
             content_type: Filter by type (persona, marketplace_listing, review)
             status: Filter by status (pending, approved, rejected)
-            skip: Records to skip
+            skip: Records to skip (ignored when a cursor is given)
             limit: Max records to return
+            cursor: Keyset cursor from a previous page's next_cursor
 
         Returns:
-            Tuple of (queue items, total count)
+            Tuple of (queue items, total count, next cursor)
         """
-        items = []
+        positions = _decode_cursor(cursor) if cursor else None
+        if positions and positions.get("queue"):
+            # The merged queue's ids are text (see below)
+            created_at, content_id = positions["queue"]
+            positions["queue"] = (created_at, str(content_id))
 
         # For now, we'll return marketplace listings that need moderation
         # In a real implementation, you'd have a content_moderation table
 
+        # Every source selects the same labelled columns (UUIDs cast to text in
+        # SQL), so the sources are merged with UNION ALL into one stream that
+        # is ordered and paged once; rows map straight onto queue items
+        # without hydrating entities
+        sources = []
+
         if not content_type or content_type == "marketplace_listing":
-            query = self.db.query(MarketplacePersona).filter(
-                MarketplacePersona.status == status
+            sources.append(
+                self.db.query(
+                    cast(MarketplacePersona.id, String).label("id"),
+                    literal("marketplace_listing").label("type"),
+                    cast(MarketplacePersona.seller_id, String).label("user_id"),
+                    func.coalesce(User.email, "Unknown").label("user_email"),
+                    MarketplacePersona.title.label("title"),
+                    MarketplacePersona.description.label("description"),
+                    MarketplacePersona.status.label("status"),
+                    MarketplacePersona.created_at.label("created_at")
+                ).outerjoin(
+                    User, User.id == MarketplacePersona.seller_id
+                ).filter(
+                    MarketplacePersona.status == status
+                )
             )
 
-            total = query.count()
-            listings = query.order_by(desc(MarketplacePersona.created_at)).offset(skip).limit(limit).all()
-
-            for listing in listings:
-                items.append({
-                    "id": str(listing.id),
-                    "type": "marketplace_listing",
-                    "content_id": str(listing.id),
-                    "user_id": str(listing.seller_id),
-                    "user_email": listing.seller.email if listing.seller else "Unknown",
-                    "title": listing.title,
-                    "description": listing.description,
-                    "status": listing.status,
-                    "created_at": listing.created_at,
-                    "flagged_count": 0
-                })
-
         if not content_type or content_type == "review":
-            # Get reviews for moderation (could be flagged reviews)
-            reviews = self.db.query(MarketplaceReview).filter(
-                MarketplaceReview.rating <= 2  # Low-rated reviews for review
-            ).order_by(desc(MarketplaceReview.created_at)).offset(skip).limit(limit).all()
-
-            for review in reviews:
-                items.append({
-                    "id": str(review.id),
-                    "type": "review",
-                    "content_id": str(review.id),
-                    "user_id": str(review.reviewer_id),
-                    "user_email": review.reviewer.email if review.reviewer else "Unknown",
-                    "title": f"Review for {review.marketplace_persona.title}" if review.marketplace_persona else "Review",
-                    "description": review.review_text,
-                    "status": "pending",
-                    "created_at": review.created_at,
-                    "flagged_count": 0
-                })
-
-        return items, len(items)
+            # Get reviews for moderation (could be flagged reviews); the title
+            # column carries the reviewed listing's title
+            listing = aliased(MarketplacePersona)
+            sources.append(
+                self.db.query(
+                    cast(MarketplaceReview.id, String).label("id"),
+                    literal("review").label("type"),
+                    cast(MarketplaceReview.reviewer_id, String).label("user_id"),
+                    func.coalesce(User.email, "Unknown").label("user_email"),
+                    listing.title.label("title"),
+                    MarketplaceReview.review_text.label("description"),
+                    literal("pending").label("status"),
+                    MarketplaceReview.created_at.label("created_at")
+                ).outerjoin(
+                    User, User.id == MarketplaceReview.reviewer_id
+                ).outerjoin(
+                    listing, listing.id == MarketplaceReview.marketplace_persona_id
+                ).filter(
+                    MarketplaceReview.rating <= 2  # Low-rated reviews for review
+                )
+            )
+
+        if not sources:
+            return [], 0, None
+
+        queue = (
+            sources[0].union_all(*sources[1:]) if len(sources) > 1 else sources[0]
+        ).subquery()
+
+        rows, total, next_position = self._fetch_page(
+            self.db.query(queue), queue.c.created_at, queue.c.id,
+            skip, limit, positions, "queue"
+        )
+
+        items = []
+        for row in rows:
+            if row.type == "review":
+                title = f"Review for {row.title}" if row.title else "Review"
+            else:
+                title = row.title
+
+            items.append({
+                "id": row.id,
+                "type": row.type,
+                "content_id": row.id,
+                "user_id": row.user_id,
+                "user_email": row.user_email,
+                "title": title,
+                "description": row.description,
+                "status": row.status,
+                "created_at": row.created_at,
+                "flagged_count": 0
+            })
+
+        return items, total, _encode_cursor({"queue": next_position})
 
     def moderate_content(
         self,
@@ -361,6 +672,7 @@ class AdminService:
                 self.db.delete(listing)
 
             self.db.commit()
+            self._invalidate_analytics_cache()
 
             logger.info(f"Moderated marketplace listing {content_id}: {action}" + (f" - Reason: {reason}" if reason else ""))
 
@@ -403,18 +715,31 @@ class AdminService:
             System health data
         """
         try:
-            # Test database connection
-            self.db.execute("SELECT 1")
-            database_connected = True
+            # Test database connection, bounded so a hung database can't stall the endpoint
+            self.db.execute(
+                text("SELECT set_config('statement_timeout', :timeout, true)"),
+                {"timeout": f"{settings.HEALTH_CHECK_TIMEOUT_MS}ms"}
+            )
+            database_connected = self.db.execute(text("SELECT 1")).scalar() == 1
         except Exception:
             database_connected = False
+        finally:
+            # End the probe transaction so the local timeout doesn't linger
+            self.db.rollback()
+
+        redis_connected = False
+        if self.cache is not None:
+            try:
+                redis_connected = bool(self.cache.ping())
+            except Exception:
+                redis_connected = False
 
         # Calculate uptime (simplified - in production, track actual uptime)
         uptime_hours = 24.0  # Placeholder
 
         return {
             "database_connected": database_connected,
-            "redis_connected": False,  # Not implemented yet
+            "redis_connected": redis_connected,
             "gemini_api_available": True,  # Would check API in production
             "total_requests_today": 0,  # Would track in middleware
             "avg_response_time_ms": 0.0,  # Would track in middleware
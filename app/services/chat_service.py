@@ -1,27 +1,101 @@
 """Chat service for managing chat sessions and messages"""
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, func, case
+from sqlalchemy.orm import Session, raiseload, load_only, selectinload
+from sqlalchemy import asc, desc, and_, or_, func, select, insert, update, bindparam, literal, cast, Date, DateTime
+from app.config import settings
+from app.core.cache import get_redis
+from app.database import commit_keep_loaded
 from app.models.chat import ChatSession, ChatMessage
 from app.models.persona import Persona
 from app.models.user import User
 from app.schemas.chat import ChatSessionCreate, ChatMessageCreate
 from app.services.gemini_service import GeminiService
-from typing import List, Optional, Dict, Any
-from datetime import timedelta, date
-from collections import defaultdict
-import json
+from typing import List, Optional, Dict, Any, Iterator, Iterable
+from datetime import datetime, time, timedelta, date
+from collections import Counter
+import base64
+import orjson
 import logging
+import uuid
 
 from app.utils.time_utils import utc_now
 
 logger = logging.getLogger(__name__)
 
+# Number of messages fetched per round-trip when streaming an export
+EXPORT_BATCH_SIZE = 500
+
+# Session list pages are serialized with their persona's status and image,
+# so load those for the whole page in one IN query and refuse any other lazy
+# relationship load (which would otherwise be one SELECT per session)
+_SESSION_LIST_LOADERS = (
+    selectinload(ChatSession.persona).load_only(Persona.status, Persona.image_path),
+    raiseload("*")
+)
+
+# Client sentinel asking the persona to greet the user, and the prompt sent in its place
+GREETING_MARKER = "[GREETING]"
+GREETING_PROMPT = (
+    "Please introduce yourself in character. "
+    "Give a brief, engaging greeting that shows your personality."
+)
+
+# Redis key for a user's cached chat statistics
+STATISTICS_CACHE_KEY = "chat:statistics:v1:{user_id}"
+
+# Weekday names indexed by PostgreSQL's EXTRACT(DOW ...) (0 = Sunday)
+WEEKDAY_NAMES = ("Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+
+# Built once so the compiled form is reused from SQLAlchemy's statement cache
+_SESSION_BY_ID = select(ChatSession).where(
+    ChatSession.id == bindparam("session_id"),
+    ChatSession.user_id == bindparam("user_id")
+).limit(1)
+
+
+def _encode_session_cursor(session: ChatSession, sort_column, sort_order: str) -> str:
+    """Encode a session list position as an opaque cursor"""
+    value = getattr(session, sort_column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+
+    payload = {
+        "sort": sort_column.key,
+        "order": sort_order,
+        "key": [session.is_pinned, value, str(session.id)]
+    }
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode()
+
+
+def _decode_session_cursor(cursor: str, sort_column, sort_order: str) -> tuple[bool, Any, uuid.UUID]:
+    """Decode a cursor from _encode_session_cursor for the same sort"""
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if payload["sort"] != sort_column.key or payload["order"] != sort_order:
+            raise ValueError("Cursor does not match the requested sort")
+
+        is_pinned, value, session_id = payload["key"]
+        if isinstance(sort_column.type, DateTime):
+            value = datetime.fromisoformat(value)
+
+        return bool(is_pinned), value, uuid.UUID(session_id)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError("Invalid cursor")
+
 
 class ChatService:
     """Service for chat session and message management"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, gemini_service: Optional[GeminiService] = None):
         self.db = db
+        self._gemini_service = gemini_service
+        self.cache = get_redis()
+
+    @property
+    def gemini_service(self) -> GeminiService:
+        """AI service bound to this session, created on first use and reused"""
+        if self._gemini_service is None:
+            self._gemini_service = GeminiService(self.db)
+        return self._gemini_service
 
     def create_session(
         self,
@@ -29,29 +103,38 @@ class ChatService:
         session_data: ChatSessionCreate
     ) -> ChatSession:
         """Create a new chat session"""
-        # Verify persona exists and is accessible
-        persona = self.db.query(Persona).filter(
-            Persona.id == session_data.persona_id
-        ).first()
+        # Insert straight from the persona row; the access check is part of the
+        # SELECT, so a missing or inaccessible persona inserts nothing
+        accessible_persona = select(
+            literal(uuid.uuid4(), ChatSession.id.type),
+            literal(user_id, ChatSession.user_id.type),
+            Persona.id,
+            Persona.name,
+            literal("active")
+        ).where(
+            Persona.id == session_data.persona_id,
+            or_(Persona.is_public == True, Persona.creator_id == user_id)
+        )
 
-        if not persona:
-            raise ValueError("Persona not found")
+        session = self.db.scalars(
+            insert(ChatSession).from_select(
+                ["id", "user_id", "persona_id", "persona_name", "status"],
+                accessible_persona
+            ).returning(ChatSession)
+        ).one_or_none()
 
-        # Check if user can access this persona
-        if not persona.is_public and persona.creator_id != user_id:
-            raise ValueError("Access denied to this persona")
+        if not session:
+            persona_exists = self.db.query(Persona.id).filter(
+                Persona.id == session_data.persona_id
+            ).first()
 
-        # Create session
-        session = ChatSession(
-            user_id=user_id,
-            persona_id=session_data.persona_id,
-            persona_name=persona.name,
-            status="active"
-        )
+            if not persona_exists:
+                raise ValueError("Persona not found")
+            raise ValueError("Access denied to this persona")
 
-        self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
+        # RETURNING populated every column, so skip the refresh after commit
+        commit_keep_loaded(self.db)
+        self._invalidate_statistics_cache(user_id)
 
         return session
 
@@ -61,44 +144,107 @@ class ChatService:
         user_id: str
     ) -> Optional[ChatSession]:
         """Get a chat session by ID (with access control)"""
-        return self.db.query(ChatSession).filter(
-            ChatSession.id == session_id,
-            ChatSession.user_id == user_id
-        ).first()
+        return self.db.execute(
+            _SESSION_BY_ID,
+            {"session_id": session_id, "user_id": user_id}
+        ).scalar_one_or_none()
 
     def get_user_sessions(
         self,
         user_id: str,
         status: Optional[str] = None,
         skip: int = 0,
-        limit: int = 50
-    ) -> tuple[List[ChatSession], int]:
-        """Get all chat sessions for a user"""
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> tuple[List[ChatSession], int, Optional[str]]:
+        """
+        Get all chat sessions for a user
+
+        Returns:
+            Tuple of (sessions, total_count, next_cursor)
+        """
         query = self.db.query(ChatSession).filter(ChatSession.user_id == user_id)
 
         if status:
             query = query.filter(ChatSession.status == status)
+        if status != "deleted":
+            # Deleted sessions are only listed when asked for; the predicate
+            # also matches the partial session list index
+            query = query.filter(ChatSession.status != "deleted")
 
         total = query.count()
-        sessions = query.order_by(
+        sessions, next_cursor = self._page_sessions(
+            query, "last_message_at", "desc", skip, limit, cursor
+        )
+
+        return sessions, total, next_cursor
+
+    def _page_sessions(
+        self,
+        query,
+        sort_by: str,
+        sort_order: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> tuple[List[ChatSession], Optional[str]]:
+        """
+        Fetch one page of sessions, pinned first, then by the sort column
+
+        The session id breaks ties so the order is total. With a cursor the
+        page seeks past the previous page's last row instead of skipping
+        rows with OFFSET, so deep pages cost the same as the first.
+
+        Returns:
+            Tuple of (sessions, cursor for the next page or None on the last page)
+        """
+        sort_column = getattr(ChatSession, sort_by, ChatSession.last_message_at)
+        descending = sort_order != "asc"
+        direction = desc if descending else asc
+
+        if cursor:
+            is_pinned, value, session_id = _decode_session_cursor(cursor, sort_column, sort_order)
+            after_value = sort_column < value if descending else sort_column > value
+            after_id = ChatSession.id < session_id if descending else ChatSession.id > session_id
+            query = query.filter(
+                or_(
+                    ChatSession.is_pinned < is_pinned,  # pinned (true) sessions come first
+                    and_(
+                        ChatSession.is_pinned == is_pinned,
+                        or_(after_value, and_(sort_column == value, after_id))
+                    )
+                )
+            )
+        else:
+            query = query.offset(skip)
+
+        sessions = query.options(*_SESSION_LIST_LOADERS).order_by(
             desc(ChatSession.is_pinned),
-            desc(ChatSession.last_message_at)
-        ).offset(skip).limit(limit).all()
+            direction(sort_column),
+            direction(ChatSession.id)
+        ).limit(limit).all()
+
+        next_cursor = None
+        if len(sessions) == limit:
+            next_cursor = _encode_session_cursor(sessions[-1], sort_column, sort_order)
 
-        return sessions, total
+        return sessions, next_cursor
 
     def delete_session(self, session_id: str, user_id: str) -> bool:
         """Delete a chat session (soft delete)"""
-        session = self.get_session_by_id(session_id, user_id)
-
-        if not session:
+        # Soft delete in a single statement (access check is part of the WHERE)
+        deleted_id = self.db.execute(
+            update(ChatSession).where(
+                ChatSession.id == session_id,
+                ChatSession.user_id == user_id
+            ).values(status="deleted").returning(ChatSession.id)
+        ).scalar_one_or_none()
+
+        if not deleted_id:
             raise ValueError("Session not found or access denied")
 
-        # Soft delete
-        session.status = "deleted"
-        session.updated_at = utc_now()
-
         self.db.commit()
+        self._invalidate_statistics_cache(user_id)
 
         return True
 
@@ -116,7 +262,12 @@ class ChatService:
         if not session:
             raise ValueError("Session not found or access denied")
 
-        messages = self.db.query(ChatMessage).filter(
+        # Responses serialize message columns only. Refuse lazy attachment
+        # loads so a serializer that starts touching them fails loudly instead
+        # of issuing one query per message (switch to selectinload then).
+        messages = self.db.query(ChatMessage).options(
+            raiseload(ChatMessage.attachments, sql_only=True)
+        ).filter(
             ChatMessage.session_id == session_id
         ).order_by(ChatMessage.created_at.asc()).offset(skip).limit(limit).all()
 
@@ -142,46 +293,63 @@ class ChatService:
         if not session:
             raise ValueError("Session not found or access denied")
 
-        # Check if this is a greeting request
-        is_greeting = message_text.strip() == "[GREETING]"
+        # Check if this is a greeting request. The substring test rejects
+        # ordinary messages without copying them; strip() only runs when the
+        # marker is present, so padded sentinels are still recognised.
+        is_greeting = (
+            GREETING_MARKER in message_text
+            and message_text.strip() == GREETING_MARKER
+        )
 
         if is_greeting:
-            # For greetings, create a prompt asking the persona to introduce themselves
-            actual_message = "Please introduce yourself in character. Give a brief, engaging greeting that shows your personality."
+            # For greetings, ask the persona to introduce themselves
+            actual_message = GREETING_PROMPT
         else:
             actual_message = message_text
 
-        # Create user message (hidden for greetings)
+        # Create user message (hidden for greetings). It is stamped now but
+        # only added to the session together with the AI reply, so both rows
+        # go out in a single INSERT and the history below doesn't include it
+        # (the generator appends the current message itself).
         user_message = ChatMessage(
             session_id=session_id,
             sender_id=user_id,
             sender_type="user",
             text="[System: User opened chat]" if is_greeting else message_text,
             message_type="system" if is_greeting else "text",
-            tokens_used=0
+            tokens_used=0,
+            created_at=utc_now()
         )
 
-        self.db.add(user_message)
-
-        # Get conversation history for context
-        conversation_history = self.db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.created_at.asc()).all()
+        # Get conversation history for context: only the tail the model will
+        # actually see, and none at all for greetings
+        conversation_history = []
+        if not is_greeting:
+            conversation_history = self.db.query(ChatMessage).options(
+                # Only the fields the prompt builder reads
+                load_only(ChatMessage.sender_type, ChatMessage.text, ChatMessage.created_at)
+            ).filter(
+                ChatMessage.session_id == session_id
+            ).order_by(
+                ChatMessage.created_at.desc()
+            ).limit(settings.AI_MAX_CONVERSATION_HISTORY).all()
+            conversation_history.reverse()
 
         # Generate AI response
-        gemini_service = GeminiService(self.db)
-        ai_result = await gemini_service.generate_response(
+        ai_result = await self.gemini_service.generate_response(
             user_id=user_id,
             persona_id=str(session.persona_id),
             user_message=actual_message,
-            conversation_history=[] if is_greeting else conversation_history,  # No history for greeting
+            conversation_history=conversation_history,
             temperature=temperature
         )
 
         # Check for errors (usage limits)
         if "error" in ai_result:
             # Still save the user message but return error
+            self.db.add(user_message)
             self.db.commit()
+            self._invalidate_statistics_cache(user_id)
             raise ValueError(ai_result.get("message", "Error generating AI response"))
 
         # Create AI message
@@ -195,16 +363,28 @@ class ChatService:
             tokens_used=ai_result.get("tokens_used", 0)
         )
 
-        self.db.add(ai_message)
-
-        # Update session
-        session.message_count += 2  # User message + AI response
-        session.last_message_at = utc_now()
-        session.updated_at = utc_now()
+        self.db.add_all([user_message, ai_message])
+
+        # Update session counters and span atomically so concurrent sends to
+        # the same session can't lose an increment. This is the only write to
+        # the session row per turn; the database stamps the recency
+        # (updated_at follows via onupdate). The two new messages are
+        # inserted when the commit flushes the session.
+        self.db.execute(
+            update(ChatSession).where(
+                ChatSession.id == session.id
+            ).values(
+                message_count=ChatSession.message_count + 2,  # User message + AI response
+                first_message_at=func.coalesce(ChatSession.first_message_at, user_message.created_at),
+                last_message_at=func.timezone('utc', func.now())
+            )
+        )
 
-        self.db.commit()
-        self.db.refresh(user_message)
-        self.db.refresh(ai_message)
+        # Both messages are fully populated by the flush (defaults are applied
+        # on INSERT), so keep them loaded across the commit instead of
+        # refreshing each one with a follow-up SELECT
+        commit_keep_loaded(self.db)
+        self._invalidate_statistics_cache(user_id)
 
         return {
             "user_message": user_message,
@@ -218,10 +398,13 @@ class ChatService:
         format: str = "json",
         include_timestamps: bool = True,
         include_metadata: bool = False
-    ) -> Dict[str, Any]:
+    ) -> Iterator[bytes]:
         """
         Export chat session
 
+        Messages are read in batches and the export document is produced
+        incrementally, so memory stays bounded regardless of chat length.
+
         Args:
             session_id: Session ID
             user_id: User ID (for access control)
@@ -230,7 +413,10 @@ class ChatService:
             include_metadata: Include session metadata
 
         Returns:
-            Dict with export data
+            Iterator of UTF-8 encoded chunks of the JSON export document
+
+        Raises:
+            ValueError: If session not found (raised before streaming starts)
         """
         # Verify session access
         session = self.get_session_by_id(session_id, user_id)
@@ -238,66 +424,135 @@ class ChatService:
         if not session:
             raise ValueError("Session not found or access denied")
 
-        # Get all messages
-        messages = self.db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.created_at.asc()).all()
+        return self._stream_export(session, format, include_timestamps, include_metadata)
 
+    def iter_session_messages(self, session_id: str, user_id: str) -> Iterator[Any]:
+        """
+        Iterate over a session's messages in chronological order
+
+        Rows carry only sender_type, text and created_at and are fetched
+        from a server-side cursor EXPORT_BATCH_SIZE at a time, so memory
+        stays flat for arbitrarily long chats.
+
+        Raises:
+            ValueError: If session not found (raised before iteration starts)
+        """
+        session = self.get_session_by_id(session_id, user_id)
+
+        if not session:
+            raise ValueError("Session not found or access denied")
+
+        return self._iter_messages(session.id)
+
+    def _iter_messages(self, session_id) -> Iterator[Any]:
+        """Yield lightweight message rows for a verified session in batches"""
+        yield from self.db.execute(
+            select(
+                ChatMessage.sender_type,
+                ChatMessage.text,
+                ChatMessage.created_at
+            ).where(
+                ChatMessage.session_id == session_id
+            ).order_by(
+                ChatMessage.created_at.asc()
+            ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+
+    def _stream_export(
+        self,
+        session: ChatSession,
+        format: str,
+        include_timestamps: bool,
+        include_metadata: bool
+    ) -> Iterator[bytes]:
+        """Yield the export document for a verified session in chunks"""
         export_data = {
             "format": format,
             "session_id": str(session.id),
             "persona_name": session.persona_name,
-            "exported_at": utc_now().isoformat()
+            "exported_at": utc_now()
         }
 
         if include_metadata:
             export_data["metadata"] = {
-                "created_at": session.created_at.isoformat(),
+                "created_at": session.created_at,
                 "message_count": session.message_count,
                 "status": session.status
             }
 
-        # Format messages based on export format
-        if format == "json":
-            export_data["messages"] = [
-                {
-                    "sender": msg.sender_type,
-                    "text": msg.text,
-                    "timestamp": msg.created_at.isoformat() if include_timestamps else None
-                }
-                for msg in messages
-            ]
-
-        elif format == "txt":
-            lines = []
-            if include_metadata:
-                lines.append(f"Chat with {session.persona_name}")
-                lines.append(f"Created: {session.created_at}")
-                lines.append("-" * 50)
-                lines.append("")
-
-            for msg in messages:
-                sender_label = "You" if msg.sender_type == "user" else session.persona_name
-                timestamp_str = f"[{msg.created_at.strftime('%Y-%m-%d %H:%M:%S')}] " if include_timestamps else ""
-                lines.append(f"{timestamp_str}{sender_label}: {msg.text}")
-                lines.append("")
-
-            export_data["content"] = "\n".join(lines)
-
-        elif format == "pdf":
+        if format == "pdf":
             # For PDF, return structured data that frontend can render
             # Frontend should handle PDF generation
             export_data["title"] = f"Chat with {session.persona_name}"
-            export_data["messages"] = [
-                {
-                    "sender": "You" if msg.sender_type == "user" else session.persona_name,
-                    "text": msg.text,
-                    "timestamp": msg.created_at.isoformat() if include_timestamps else None
-                }
-                for msg in messages
-            ]
 
-        return export_data
+        # Messages are streamed from the database in batches
+        messages = self._iter_messages(session.id)
+
+        try:
+            # Open the JSON object with the header fields, leaving it unterminated
+            yield orjson.dumps(export_data)[:-1]
+
+            # Format messages based on export format
+            if format in ("json", "pdf"):
+                # json and pdf entries share one shape and differ only in the
+                # sender label, so a single dict is refilled for every message
+                # and the format is resolved once, outside the loop
+                relabel_sender = format == "pdf"
+                persona_label = session.persona_name
+                entry = {"sender": None, "text": None, "timestamp": None}
+
+                yield b', "messages": ['
+                for index, msg in enumerate(messages):
+                    if relabel_sender:
+                        entry["sender"] = "You" if msg.sender_type == "user" else persona_label
+                    else:
+                        entry["sender"] = msg.sender_type
+                    entry["text"] = msg.text
+                    if include_timestamps:
+                        # orjson encodes datetimes natively (same ISO format as isoformat())
+                        entry["timestamp"] = msg.created_at
+                    item = orjson.dumps(entry)
+                    yield b", " + item if index else item
+                yield b"]}"
+
+            elif format == "txt":
+                # Stream the "content" string value, JSON-escaping each line
+                yield b', "content": "'
+                for index, line in enumerate(self._export_txt_lines(session, messages, include_timestamps, include_metadata)):
+                    yield orjson.dumps(line if index == 0 else "\n" + line)[1:-1]
+                yield b'"}'
+
+            else:
+                yield b"}"
+        finally:
+            # Release the connection held by the batched message cursor
+            self.db.close()
+
+    def _export_txt_lines(
+        self,
+        session: ChatSession,
+        messages: Iterable[Any],
+        include_timestamps: bool,
+        include_metadata: bool
+    ) -> Iterator[str]:
+        """Yield the lines of a plain-text export"""
+        if include_metadata:
+            yield f"Chat with {session.persona_name}"
+            yield f"Created: {session.created_at}"
+            yield "-" * 50
+            yield ""
+
+        # Each message is followed by a blank line; the trailing newline folds
+        # that blank line into the same chunk
+        persona_label = session.persona_name
+        if include_timestamps:
+            for msg in messages:
+                sender_label = "You" if msg.sender_type == "user" else persona_label
+                yield f"{msg.created_at:[%Y-%m-%d %H:%M:%S]} {sender_label}: {msg.text}\n"
+        else:
+            for msg in messages:
+                sender_label = "You" if msg.sender_type == "user" else persona_label
+                yield f"{sender_label}: {msg.text}\n"
 
     def cleanup_old_free_tier_sessions(self, days: int = 7):
         """
@@ -306,21 +561,20 @@ class ChatService:
         """
         threshold = utc_now() - timedelta(days=days)
 
-        # Get free tier users
-        free_users = self.db.query(User).filter(User.subscription_tier == "free").all()
-        free_user_ids = [str(u.id) for u in free_users]
-
-        if not free_user_ids:
-            return
+        # Soft-delete in one UPDATE; the free-tier check is a correlated
+        # EXISTS, so no user ids are materialized in Python or in an IN list
+        is_free_tier_owner = select(User.id).where(
+            User.id == ChatSession.user_id,
+            User.subscription_tier == "free"
+        ).exists()
 
-        # Delete old sessions
-        deleted_count = self.db.query(ChatSession).filter(
-            and_(
-                ChatSession.user_id.in_(free_user_ids),
+        deleted_count = self.db.execute(
+            update(ChatSession).where(
+                ChatSession.status == "active",
                 ChatSession.last_message_at < threshold,
-                ChatSession.status == "active"
-            )
-        ).update({"status": "deleted"}, synchronize_session=False)
+                is_free_tier_owner
+            ).values(status="deleted").execution_options(synchronize_session=False)
+        ).rowcount
 
         self.db.commit()
 
@@ -344,13 +598,14 @@ class ChatService:
         sort_by: str = "last_message_at",
         sort_order: str = "desc",
         skip: int = 0,
-        limit: int = 20
-    ) -> tuple[List[ChatSession], int, dict]:
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> tuple[List[ChatSession], int, dict, Optional[str]]:
         """
         Advanced search for chat sessions with filters
 
         Returns:
-            Tuple of (sessions, total_count, filters_applied)
+            Tuple of (sessions, total_count, filters_applied, next_cursor)
         """
         base_query = self.db.query(ChatSession).filter(
             ChatSession.user_id == user_id,
@@ -382,39 +637,29 @@ class ChatService:
             base_query = base_query.filter(ChatSession.is_pinned == is_pinned)
             filters_applied["is_pinned"] = is_pinned
 
-        # Date range filters
+        # Date range filters (half-open timestamp range so the
+        # last_message_at indexes can be used)
         if start_date:
             base_query = base_query.filter(
-                func.date(ChatSession.last_message_at) >= start_date
+                ChatSession.last_message_at >= datetime.combine(start_date, time.min)
             )
             filters_applied["start_date"] = start_date.isoformat()
 
         if end_date:
             base_query = base_query.filter(
-                func.date(ChatSession.last_message_at) <= end_date
+                ChatSession.last_message_at < datetime.combine(end_date + timedelta(days=1), time.min)
             )
             filters_applied["end_date"] = end_date.isoformat()
 
         # Get total count before pagination
         total = base_query.count()
 
-        # Sorting - pinned items always first
-        sort_column = getattr(ChatSession, sort_by, ChatSession.last_message_at)
-        if sort_order == "asc":
-            base_query = base_query.order_by(
-                desc(ChatSession.is_pinned),
-                sort_column.asc()
-            )
-        else:
-            base_query = base_query.order_by(
-                desc(ChatSession.is_pinned),
-                sort_column.desc()
-            )
-
-        # Apply pagination
-        sessions = base_query.offset(skip).limit(limit).all()
+        # Sorting (pinned items always first) and pagination
+        sessions, next_cursor = self._page_sessions(
+            base_query, sort_by, sort_order, skip, limit, cursor
+        )
 
-        return sessions, total, filters_applied
+        return sessions, total, filters_applied, next_cursor
 
     def update_session(
         self,
@@ -454,8 +699,8 @@ class ChatService:
         if status is not None and status in ["active", "archived"]:
             session.status = status
 
-        session.updated_at = utc_now()
         self.db.commit()
+        self._invalidate_statistics_cache(user_id)
         self.db.refresh(session)
 
         return session
@@ -468,9 +713,9 @@ class ChatService:
             raise ValueError("Session not found or access denied")
 
         session.is_pinned = not session.is_pinned
-        session.updated_at = utc_now()
 
         self.db.commit()
+        self._invalidate_statistics_cache(user_id)
         self.db.refresh(session)
 
         return session
@@ -479,6 +724,9 @@ class ChatService:
         """
         Get comprehensive chat activity statistics for a user
 
+        Served from a short-lived per-user cache when Redis is configured;
+        chat writes for the user drop the cached copy.
+
         Args:
             user_id: User ID
             days: Number of days to include in weekly activity (default 30, but we show last 7)
@@ -486,65 +734,103 @@ class ChatService:
         Returns:
             Dict with statistics data
         """
-        # Base query for user's sessions (excluding deleted)
-        base_query = self.db.query(ChatSession).filter(
-            ChatSession.user_id == user_id,
-            ChatSession.status != "deleted"
-        )
+        cached = self._get_cached_statistics(user_id)
+        if cached is not None:
+            return cached
 
-        # Count by status
-        status_counts = self.db.query(
-            ChatSession.status,
-            func.count(ChatSession.id).label("count")
-        ).filter(
-            ChatSession.user_id == user_id,
-            ChatSession.status != "deleted"
-        ).group_by(ChatSession.status).all()
+        statistics = self._compute_statistics(user_id)
+        self._cache_statistics(user_id, statistics)
 
-        status_dict = {row.status: row.count for row in status_counts}
-        active_sessions = status_dict.get("active", 0)
-        archived_sessions = status_dict.get("archived", 0)
-        total_sessions = active_sessions + archived_sessions
+        return statistics
 
-        # Pinned count
-        pinned_sessions = base_query.filter(ChatSession.is_pinned == True).count()
+    def _get_cached_statistics(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached statistics for a user, or None on miss or cache error"""
+        if self.cache is None:
+            return None
 
-        # Total messages
-        total_messages = self.db.query(func.sum(ChatSession.message_count)).filter(
-            ChatSession.user_id == user_id,
-            ChatSession.status != "deleted"
-        ).scalar() or 0
+        try:
+            cached = self.cache.get(STATISTICS_CACHE_KEY.format(user_id=user_id))
+        except Exception as e:
+            logger.warning(f"Chat statistics cache read failed: {str(e)}")
+            return None
 
-        # Unique personas
-        unique_personas = self.db.query(
-            func.count(func.distinct(ChatSession.persona_id))
-        ).filter(
-            ChatSession.user_id == user_id,
-            ChatSession.status != "deleted"
-        ).scalar() or 0
+        return orjson.loads(cached) if cached else None
+
+    def _cache_statistics(self, user_id: str, statistics: Dict[str, Any]):
+        """Store a user's statistics with a short TTL"""
+        if self.cache is None:
+            return
+
+        try:
+            self.cache.set(
+                STATISTICS_CACHE_KEY.format(user_id=user_id),
+                orjson.dumps(statistics, default=str),
+                ex=settings.CHAT_STATISTICS_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Chat statistics cache write failed: {str(e)}")
+
+    def _invalidate_statistics_cache(self, user_id: str):
+        """Drop a user's cached statistics after a chat write"""
+        if self.cache is None:
+            return
+
+        try:
+            self.cache.delete(STATISTICS_CACHE_KEY.format(user_id=user_id))
+        except Exception as e:
+            logger.warning(f"Chat statistics cache invalidation failed: {str(e)}")
+
+    def _compute_statistics(self, user_id: str) -> Dict[str, Any]:
+        """Compute chat activity statistics for a user from the database"""
+        # The aggregates below only return plain values, so they run as Core
+        # selects: rows come back as lightweight Row tuples without going
+        # through the ORM Query layer.
+
+        # Status, pinned, persona and message totals in a single scan (COUNT ... FILTER)
+        summary = self.db.execute(
+            select(
+                func.count().filter(ChatSession.status == "active").label("active"),
+                func.count().filter(ChatSession.status == "archived").label("archived"),
+                func.count().filter(ChatSession.is_pinned == True).label("pinned"),
+                func.count(func.distinct(ChatSession.persona_id)).label("unique_personas"),
+                func.sum(ChatSession.message_count).label("messages")
+            ).where(
+                ChatSession.user_id == user_id,
+                ChatSession.status != "deleted"
+            )
+        ).one()
+
+        active_sessions = summary.active
+        archived_sessions = summary.archived
+        total_sessions = active_sessions + archived_sessions
+        pinned_sessions = summary.pinned
+        total_messages = summary.messages or 0
+        unique_personas = summary.unique_personas
 
         # Average messages per session
         avg_messages = (total_messages / total_sessions) if total_sessions > 0 else 0
 
         # Most active personas (top 5)
-        persona_activity = self.db.query(
-            ChatSession.persona_id,
-            ChatSession.persona_name,
-            Persona.image_path,
-            func.count(ChatSession.id).label("session_count"),
-            func.sum(ChatSession.message_count).label("message_count")
-        ).outerjoin(
-            Persona, ChatSession.persona_id == Persona.id
-        ).filter(
-            ChatSession.user_id == user_id,
-            ChatSession.status != "deleted"
-        ).group_by(
-            ChatSession.persona_id,
-            ChatSession.persona_name,
-            Persona.image_path
-        ).order_by(
-            desc("message_count")
-        ).limit(5).all()
+        persona_activity = self.db.execute(
+            select(
+                ChatSession.persona_id,
+                ChatSession.persona_name,
+                Persona.image_path,
+                func.count(ChatSession.id).label("session_count"),
+                func.sum(ChatSession.message_count).label("message_count")
+            ).outerjoin(
+                Persona, ChatSession.persona_id == Persona.id
+            ).where(
+                ChatSession.user_id == user_id,
+                ChatSession.status != "deleted"
+            ).group_by(
+                ChatSession.persona_id,
+                ChatSession.persona_name,
+                Persona.image_path
+            ).order_by(
+                desc("message_count")
+            ).limit(5)
+        ).all()
 
         personas_activity = [
             {
@@ -559,59 +845,75 @@ class ChatService:
 
         most_active_persona = personas_activity[0] if personas_activity else None
 
-        # Weekly activity (last 7 days)
-        seven_days_ago = utc_now() - timedelta(days=7)
+        # Weekly activity (last 7 days), zero-filled server-side: every day
+        # from generate_series is LEFT JOINed to its session/message counts
+        today = utc_now().date()
+        week_start = today - timedelta(days=6)
 
-        # Sessions per day
-        daily_sessions = self.db.query(
-            func.date(ChatSession.created_at).label("date"),
+        daily_sessions = select(
+            func.date(ChatSession.created_at).label("day"),
             func.count(ChatSession.id).label("count")
-        ).filter(
+        ).where(
             ChatSession.user_id == user_id,
             ChatSession.status != "deleted",
-            ChatSession.created_at >= seven_days_ago
+            ChatSession.created_at >= week_start
         ).group_by(
             func.date(ChatSession.created_at)
-        ).all()
+        ).cte("daily_sessions")
 
-        daily_sessions_dict = {row.date: row.count for row in daily_sessions}
-
-        # Messages per day (from ChatMessage)
-        daily_messages = self.db.query(
-            func.date(ChatMessage.created_at).label("date"),
+        daily_messages = select(
+            func.date(ChatMessage.created_at).label("day"),
             func.count(ChatMessage.id).label("count")
         ).join(
             ChatSession, ChatMessage.session_id == ChatSession.id
-        ).filter(
+        ).where(
             ChatSession.user_id == user_id,
             ChatSession.status != "deleted",
-            ChatMessage.created_at >= seven_days_ago
+            ChatMessage.created_at >= week_start
         ).group_by(
             func.date(ChatMessage.created_at)
+        ).cte("daily_messages")
+
+        days = func.generate_series(
+            week_start, today, timedelta(days=1)
+        ).table_valued("day").alias("days")
+        day = cast(days.c.day, Date)
+
+        weekly_rows = self.db.execute(
+            select(
+                day.label("date"),
+                func.coalesce(daily_sessions.c.count, 0).label("sessions_created"),
+                func.coalesce(daily_messages.c.count, 0).label("messages_sent")
+            ).select_from(
+                days
+            ).outerjoin(
+                daily_sessions, daily_sessions.c.day == day
+            ).outerjoin(
+                daily_messages, daily_messages.c.day == day
+            ).order_by(day)
+        )
+
+        weekly_activity = [dict(row._mapping) for row in weekly_rows]
+
+        # Most active day of week (at most 7 rows, aggregated in SQL)
+        day_of_week = func.extract("dow", ChatSession.last_message_at)
+        day_of_week_rows = self.db.execute(
+            select(
+                day_of_week.label("dow"),
+                func.sum(ChatSession.message_count).label("message_count")
+            ).where(
+                ChatSession.user_id == user_id,
+                ChatSession.status != "deleted"
+            ).group_by(day_of_week)
         ).all()
 
-        daily_messages_dict = {row.date: row.count for row in daily_messages}
-
-        # Build weekly activity list
-        weekly_activity = []
-        for i in range(6, -1, -1):
-            day = (utc_now() - timedelta(days=i)).date()
-            weekly_activity.append({
-                "date": day.isoformat(),
-                "sessions_created": daily_sessions_dict.get(day, 0),
-                "messages_sent": daily_messages_dict.get(day, 0)
-            })
-
-        # Most active day of week
-        day_of_week_counts = defaultdict(int)
-        all_sessions = base_query.all()
-        for session in all_sessions:
-            day_name = session.last_message_at.strftime("%A")
-            day_of_week_counts[day_name] += session.message_count
-
-        most_active_day = None
-        if day_of_week_counts:
-            most_active_day = max(day_of_week_counts, key=day_of_week_counts.get)
+        day_of_week_counts = Counter({
+            WEEKDAY_NAMES[int(row.dow)]: row.message_count or 0
+            for row in day_of_week_rows
+        })
+
+        top_day = day_of_week_counts.most_common(1)
+        most_active_day = top_day[0][0] if top_day else None
 
         return {
             "total_sessions": total_sessions,
@@ -1,12 +1,20 @@
 """Firebase Cloud Messaging service"""
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import json
 import logging
 import os
+import threading
+import uuid
 
 from app.utils.time_utils import utc_now
 
+from app.core.cache import get_redis
+from app.database import commit_keep_loaded
 from app.models.user import User
 from app.models.notification import FCMToken
 from app.schemas.notification import RegisterFCMTokenRequest
@@ -14,40 +22,70 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of registration tokens FCM accepts in one multicast message
+FCM_MULTICAST_LIMIT = 500
+
+# Redis key for a user's active (token id, token) pairs
+TOKEN_CACHE_KEY = "fcm:tokens:v1:{user_id}"
+
+_firebase_app = None
+_firebase_checked = False
+_firebase_lock = threading.Lock()
+
+
+def get_firebase_app():
+    """
+    Get the shared Firebase Admin app (lazy loading)
+
+    Initialization is attempted once per process; returns None when the
+    SDK or the credentials file is missing, so notifications are only logged.
+    """
+    global _firebase_app, _firebase_checked
+
+    if _firebase_checked:
+        return _firebase_app
+
+    with _firebase_lock:
+        if _firebase_checked:
+            return _firebase_app
+
+        try:
+            import firebase_admin
+            from firebase_admin import credentials
+
+            if not firebase_admin._apps:
+                # Check if credentials file exists
+                if os.path.exists(settings.FCM_CREDENTIALS_PATH):
+                    cred = credentials.Certificate(settings.FCM_CREDENTIALS_PATH)
+                    _firebase_app = firebase_admin.initialize_app(cred)
+                    logger.info("Firebase Admin SDK initialized successfully")
+                else:
+                    logger.warning(f"FCM credentials file not found at {settings.FCM_CREDENTIALS_PATH}")
+                    logger.info("Running in development mode - notifications will be logged only")
+            else:
+                _firebase_app = firebase_admin.get_app()
+
+        except ImportError:
+            logger.error("firebase-admin package not installed. Run: pip install firebase-admin")
+            logger.info("Running in development mode - notifications will be logged only")
+        except Exception as e:
+            logger.error(f"Failed to initialize Firebase Admin SDK: {str(e)}")
+
+        _firebase_checked = True
+
+    return _firebase_app
+
 
 class FCMService:
     """Service for managing Firebase Cloud Messaging"""
 
     def __init__(self, db: Session):
         self.db = db
-        self._firebase_app = None
+        self.cache = get_redis()
 
     def _get_firebase_app(self):
-        """Initialize Firebase Admin SDK (lazy loading)"""
-        if self._firebase_app is None:
-            try:
-                import firebase_admin
-                from firebase_admin import credentials
-
-                if not firebase_admin._apps:
-                    # Check if credentials file exists
-                    if os.path.exists(settings.FCM_CREDENTIALS_PATH):
-                        cred = credentials.Certificate(settings.FCM_CREDENTIALS_PATH)
-                        self._firebase_app = firebase_admin.initialize_app(cred)
-                        logger.info("Firebase Admin SDK initialized successfully")
-                    else:
-                        logger.warning(f"FCM credentials file not found at {settings.FCM_CREDENTIALS_PATH}")
-                        logger.info("Running in development mode - notifications will be logged only")
-                else:
-                    self._firebase_app = firebase_admin.get_app()
-
-            except ImportError:
-                logger.error("firebase-admin package not installed. Run: pip install firebase-admin")
-                logger.info("Running in development mode - notifications will be logged only")
-            except Exception as e:
-                logger.error(f"Failed to initialize Firebase Admin SDK: {str(e)}")
-
-        return self._firebase_app
+        """Get the shared Firebase app (None in development mode)"""
+        return get_firebase_app()
 
     def register_token(
         self,
@@ -64,56 +102,137 @@ class FCMService:
         Returns:
             FCM token record
         """
-        # Check if token already exists
-        existing_token = self.db.query(FCMToken).filter(
-            FCMToken.fcm_token == token_data.fcm_token
-        ).first()
-
-        if existing_token:
-            # Update existing token
-            existing_token.user_id = user_id
-            existing_token.device_id = token_data.device_id
-            existing_token.platform = token_data.platform
-            existing_token.is_active = True
-            existing_token.last_used_at = utc_now()
-            self.db.commit()
-            self.db.refresh(existing_token)
-
-            logger.info(f"Updated FCM token for user {user_id}, device {token_data.device_id}")
-            return existing_token
-
-        # Check if device already has a token
-        device_token = self.db.query(FCMToken).filter(
-            FCMToken.user_id == user_id,
-            FCMToken.device_id == token_data.device_id
-        ).first()
-
-        if device_token:
-            # Update device token
-            device_token.fcm_token = token_data.fcm_token
-            device_token.platform = token_data.platform
-            device_token.is_active = True
-            device_token.last_used_at = utc_now()
-            self.db.commit()
-            self.db.refresh(device_token)
-
-            logger.info(f"Updated FCM token for user {user_id}, device {token_data.device_id}")
-            return device_token
+        # A device keeps a single token: drop any older token registered for
+        # this user's device before claiming the new one
+        self.db.execute(
+            delete(FCMToken).where(
+                FCMToken.user_id == user_id,
+                FCMToken.device_id == token_data.device_id,
+                FCMToken.fcm_token != token_data.fcm_token
+            )
+        )
 
-        # Create new token
-        new_token = FCMToken(
+        # Insert the token, or take over the existing row if it is already
+        # registered (e.g. the device changed hands), in one atomic statement
+        stmt = insert(FCMToken).values(
             user_id=user_id,
             fcm_token=token_data.fcm_token,
             device_id=token_data.device_id,
-            platform=token_data.platform
+            platform=token_data.platform,
+            is_active=True,
+            last_used_at=utc_now()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FCMToken.fcm_token],
+            set_={
+                "user_id": stmt.excluded.user_id,
+                "device_id": stmt.excluded.device_id,
+                "platform": stmt.excluded.platform,
+                "is_active": True,
+                "last_used_at": stmt.excluded.last_used_at
+            }
+        )
+
+        # A subquery in RETURNING sees the table as it was before the
+        # statement, so this yields the token's previous owner (if any)
+        previous = aliased(FCMToken)
+        previous_owner = select(previous.user_id).where(
+            previous.fcm_token == token_data.fcm_token
+        ).scalar_subquery()
+
+        token, previous_user_id = self.db.execute(
+            stmt.returning(FCMToken, previous_owner)
+        ).one()
+
+        # RETURNING populated every column, so skip the refresh after commit
+        commit_keep_loaded(self.db)
+
+        self._invalidate_token_cache(user_id)
+        if previous_user_id is not None and str(previous_user_id) != str(user_id):
+            self._invalidate_token_cache(previous_user_id)
+
+        logger.info(f"Registered FCM token for user {user_id}, device {token_data.device_id}")
+        return token
+
+    def register_tokens_bulk(
+        self,
+        registrations: List[Tuple[str, RegisterFCMTokenRequest]]
+    ) -> int:
+        """
+        Register or update many FCM tokens at once (e.g. re-registration jobs)
+
+        Applies the same rules as register_token - one token per user device,
+        and an existing token moves to the registering user - with one
+        DELETE and one multi-row upsert instead of a round-trip per token.
+
+        Args:
+            registrations: (user_id, token data) pairs
+
+        Returns:
+            Number of tokens registered
+        """
+        # A statement can't upsert the same token or user device twice, so
+        # the last registration for each wins
+        by_token = {}
+        for user_id, token_data in registrations:
+            by_token[token_data.fcm_token] = (str(user_id), token_data)
+
+        by_device = {}
+        for user_id, token_data in by_token.values():
+            by_device[(user_id, token_data.device_id)] = token_data
+
+        if not by_device:
+            return 0
+
+        tokens = [token_data.fcm_token for token_data in by_device.values()]
+
+        # Owners whose cached token lists change when their tokens move
+        affected_users = {user_id for user_id, _ in by_device}
+        affected_users.update(
+            str(owner) for owner in self.db.scalars(
+                select(FCMToken.user_id).where(FCMToken.fcm_token.in_(tokens)).distinct()
+            )
         )
 
-        self.db.add(new_token)
+        # Drop older tokens held by the registering devices
+        self.db.execute(
+            delete(FCMToken).where(
+                tuple_(FCMToken.user_id, FCMToken.device_id).in_(list(by_device)),
+                FCMToken.fcm_token.not_in(tokens)
+            ).execution_options(synchronize_session=False)
+        )
+
+        now = utc_now()
+        stmt = insert(FCMToken).values([
+            {
+                "user_id": user_id,
+                "fcm_token": token_data.fcm_token,
+                "device_id": device_id,
+                "platform": token_data.platform,
+                "is_active": True,
+                "last_used_at": now
+            }
+            for (user_id, device_id), token_data in by_device.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FCMToken.fcm_token],
+            set_={
+                "user_id": stmt.excluded.user_id,
+                "device_id": stmt.excluded.device_id,
+                "platform": stmt.excluded.platform,
+                "is_active": True,
+                "last_used_at": stmt.excluded.last_used_at
+            }
+        )
+
+        self.db.execute(stmt)
         self.db.commit()
-        self.db.refresh(new_token)
 
-        logger.info(f"Registered new FCM token for user {user_id}, device {token_data.device_id}")
-        return new_token
+        for user_id in affected_users:
+            self._invalidate_token_cache(user_id)
+
+        logger.info(f"Registered {len(by_device)} FCM tokens in bulk")
+        return len(by_device)
 
     def remove_token(self, user_id: str, device_id: str) -> bool:
         """
@@ -139,6 +258,7 @@ class FCMService:
 
         self.db.delete(token)
         self.db.commit()
+        self._invalidate_token_cache(user_id)
 
         logger.info(f"Removed FCM token for user {user_id}, device {device_id}")
         return True
@@ -160,6 +280,93 @@ class FCMService:
 
         return tokens
 
+    def _get_target_tokens(self, user_id: Optional[str]) -> List[Tuple[uuid.UUID, str]]:
+        """
+        Get (token id, token) pairs to notify
+
+        A single user's tokens are served from a short-lived cache when Redis
+        is configured; registering or removing a token drops the cached copy.
+        """
+        if user_id:
+            cached = self._get_cached_tokens(user_id)
+            if cached is not None:
+                return cached
+
+        # Only the id and token string are needed, so fetch plain rows
+        # rather than FCMToken instances
+        if user_id:
+            query = select(FCMToken.id, FCMToken.fcm_token).where(
+                FCMToken.is_active == True,
+                FCMToken.user_id == user_id
+            )
+        else:
+            # Broadcast to all active tokens (limit to prevent abuse): one
+            # token per device of each user (device ids are client-supplied
+            # and can repeat across accounts), then the most recently used
+            # devices first
+            latest = select(
+                FCMToken.id, FCMToken.fcm_token, FCMToken.last_used_at
+            ).where(
+                FCMToken.is_active == True
+            ).distinct(
+                FCMToken.user_id, FCMToken.device_id
+            ).order_by(
+                FCMToken.user_id,
+                FCMToken.device_id,
+                FCMToken.last_used_at.desc()
+            ).subquery()
+
+            query = select(latest.c.id, latest.c.fcm_token).order_by(
+                latest.c.last_used_at.desc()
+            ).limit(1000)
+
+        tokens = [(row.id, row.fcm_token) for row in self.db.execute(query)]
+
+        if user_id:
+            self._cache_tokens(user_id, tokens)
+
+        return tokens
+
+    def _get_cached_tokens(self, user_id: str) -> Optional[List[Tuple[uuid.UUID, str]]]:
+        """Return a user's cached tokens, or None on miss or cache error"""
+        if self.cache is None:
+            return None
+
+        try:
+            cached = self.cache.get(TOKEN_CACHE_KEY.format(user_id=user_id))
+        except Exception as e:
+            logger.warning(f"FCM token cache read failed: {str(e)}")
+            return None
+
+        if not cached:
+            return None
+
+        return [(uuid.UUID(token_id), token) for token_id, token in json.loads(cached)]
+
+    def _cache_tokens(self, user_id: str, tokens: List[Tuple[uuid.UUID, str]]):
+        """Store a user's active tokens with a short TTL"""
+        if self.cache is None:
+            return
+
+        try:
+            self.cache.set(
+                TOKEN_CACHE_KEY.format(user_id=user_id),
+                json.dumps([[str(token_id), token] for token_id, token in tokens]),
+                ex=settings.FCM_TOKEN_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"FCM token cache write failed: {str(e)}")
+
+    def _invalidate_token_cache(self, *user_ids):
+        """Drop users' cached tokens after their token sets changed (one DEL)"""
+        if self.cache is None or not user_ids:
+            return
+
+        try:
+            self.cache.delete(*(TOKEN_CACHE_KEY.format(user_id=user_id) for user_id in user_ids))
+        except Exception as e:
+            logger.warning(f"FCM token cache invalidation failed: {str(e)}")
+
     def send_notification(
         self,
         user_id: Optional[str],
@@ -186,16 +393,7 @@ class FCMService:
             app = self._get_firebase_app()
 
             # Get target tokens
-            if user_id:
-                tokens = self.db.query(FCMToken).filter(
-                    FCMToken.user_id == user_id,
-                    FCMToken.is_active == True
-                ).all()
-            else:
-                # Broadcast to all active tokens (limit to prevent abuse)
-                tokens = self.db.query(FCMToken).filter(
-                    FCMToken.is_active == True
-                ).limit(1000).all()
+            tokens = self._get_target_tokens(user_id)
 
             if not tokens:
                 return {
@@ -205,7 +403,8 @@ class FCMService:
                     "failed_count": 0
                 }
 
-            token_strings = [token.fcm_token for token in tokens]
+            token_ids = [token_id for token_id, _ in tokens]
+            token_strings = [token for _, token in tokens]
 
             # If Firebase is not initialized, just log
             if app is None:
@@ -232,28 +431,73 @@ class FCMService:
                     image=image_url
                 )
 
-                # Build message
-                message = messaging.MulticastMessage(
-                    notification=notification,
-                    data=data or {},
-                    tokens=token_strings
+                def send_chunk(chunk: List[str]):
+                    # send_multicast relied on the retired batch endpoint;
+                    # send_each_for_multicast reports a result per token
+                    # instead of raising when some of them fail
+                    return messaging.send_each_for_multicast(
+                        messaging.MulticastMessage(
+                            notification=notification,
+                            data=data or {},
+                            tokens=chunk
+                        )
+                    )
+
+                # FCM accepts at most FCM_MULTICAST_LIMIT tokens per multicast,
+                # so larger audiences are split and the chunks sent in parallel
+                chunks = [
+                    token_strings[i:i + FCM_MULTICAST_LIMIT]
+                    for i in range(0, len(token_strings), FCM_MULTICAST_LIMIT)
+                ]
+
+                if len(chunks) == 1:
+                    responses = [send_chunk(chunks[0])]
+                else:
+                    max_workers = min(len(chunks), (os.cpu_count() or 1) + 4)
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        responses = list(executor.map(send_chunk, chunks))
+
+                sent_count = sum(response.success_count for response in responses)
+                failed_count = sum(response.failure_count for response in responses)
+
+                # Deactivate tokens FCM reports as permanently invalid so they
+                # are skipped by later sends (results follow token order)
+                results = (result for response in responses for result in response.responses)
+                invalid_ids = [
+                    token_id
+                    for token_id, result in zip(token_ids, results)
+                    if not result.success and isinstance(
+                        result.exception,
+                        (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+                    )
+                ]
+
+                # Stamp every targeted token in one UPDATE instead of one per row
+                self.db.execute(
+                    update(FCMToken).where(
+                        FCMToken.id.in_(token_ids)
+                    ).values(last_used_at=utc_now()).execution_options(synchronize_session=False)
                 )
 
-                # Send
-                response = messaging.send_multicast(message)
+                if invalid_ids:
+                    self.db.execute(
+                        update(FCMToken).where(
+                            FCMToken.id.in_(invalid_ids)
+                        ).values(is_active=False).execution_options(synchronize_session=False)
+                    )
 
-                # Update token last_used_at
-                for token in tokens:
-                    token.last_used_at = utc_now()
                 self.db.commit()
 
-                logger.info(f"Sent notification to {response.success_count}/{len(token_strings)} devices")
+                if invalid_ids and user_id:
+                    self._invalidate_token_cache(user_id)
+
+                logger.info(f"Sent notification to {sent_count}/{len(token_strings)} devices")
 
                 return {
                     "success": True,
                     "message": f"Notification sent successfully",
-                    "sent_count": response.success_count,
-                    "failed_count": response.failure_count
+                    "sent_count": sent_count,
+                    "failed_count": failed_count
                 }
 
             except Exception as e:
@@ -278,16 +522,17 @@ class FCMService:
         """
         cutoff_date = utc_now() - timedelta(days=days)
 
-        inactive_tokens = self.db.query(FCMToken).filter(
-            FCMToken.last_used_at < cutoff_date
+        # Single DELETE ... WHERE; nothing is loaded into the session, only
+        # the owners come back so their cached token sets can be dropped
+        owner_ids = self.db.scalars(
+            delete(FCMToken).where(
+                FCMToken.last_used_at < cutoff_date
+            ).returning(FCMToken.user_id).execution_options(synchronize_session=False)
         ).all()
-
-        count = len(inactive_tokens)
-
-        for token in inactive_tokens:
-            self.db.delete(token)
+        count = len(owner_ids)
 
         self.db.commit()
+        self._invalidate_token_cache(*set(owner_ids))
 
         logger.info(f"Cleaned up {count} inactive FCM tokens")
         return count
@@ -1,5 +1,6 @@
 """File service for handling file uploads via FileRunner"""
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, update
 from app.models.file import UploadedFile
 from app.models.user import User, UsageTracking
 from app.config import settings
@@ -7,15 +8,42 @@ from app.services.filerunner_service import filerunner_service
 from typing import Optional, List, Dict, Any
 from fastapi import UploadFile
 from PIL import Image
+import asyncio
 import os
 import uuid
-import aiofiles
 import logging
 import io
 from pathlib import Path
+from types import MappingProxyType
 
 logger = logging.getLogger(__name__)
 
+# settings.ALLOWED_FILE_EXTENSIONS re-parses the config string on each access,
+# so the allowed set and its error-message form are built once here
+ALLOWED_EXTENSIONS = frozenset(settings.ALLOWED_FILE_EXTENSIONS)
+ALLOWED_EXTENSIONS_DISPLAY = ", ".join(settings.ALLOWED_FILE_EXTENSIONS)
+
+# Pillow save format per image extension (anything else is saved as JPEG)
+IMAGE_SAVE_FORMATS = MappingProxyType({'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'gif': 'GIF'})
+
+# Upload categories that get a temporary processing directory
+UPLOAD_CATEGORIES = ("avatar", "persona_image", "chat_attachment", "knowledge_base")
+
+# Uploads resized and re-encoded before storage
+OPTIMIZED_IMAGE_CATEGORIES = frozenset({"avatar", "persona_image"})
+OPTIMIZED_IMAGE_EXTENSIONS = frozenset({"jpg", "jpeg", "png"})
+
+# Upload dirs whose category directories already exist in this process, so
+# they aren't re-created for every FileService (i.e. every request)
+_prepared_upload_dirs = set()
+
+# libvips is optional: when available it resizes uploads with a streamed,
+# shrink-on-load decode; otherwise Pillow is used
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
 
 class FileService:
     """Service for file upload and management using FileRunner"""
@@ -27,11 +55,23 @@ class FileService:
 
     def _ensure_upload_directories(self):
         """Create upload directories if they don't exist (for temporary processing)"""
-        categories = ["avatar", "persona_image", "chat_attachment", "knowledge_base"]
-        for category in categories:
+        if self.upload_dir in _prepared_upload_dirs:
+            return
+
+        for category in UPLOAD_CATEGORIES:
             path = Path(self.upload_dir) / category
             path.mkdir(parents=True, exist_ok=True)
 
+        _prepared_upload_dirs.add(self.upload_dir)
+
+    @staticmethod
+    def _rewound_size(file_obj) -> int:
+        """Get a file object's size, leaving it positioned at its start"""
+        file_obj.seek(0, os.SEEK_END)
+        size = file_obj.tell()
+        file_obj.seek(0)
+        return size
+
     def _get_file_extension(self, filename: str) -> str:
         """Extract file extension"""
         return os.path.splitext(filename)[1].lower().lstrip('.')
@@ -50,10 +90,10 @@ class FileService:
 
         # Check file extension
         extension = self._get_file_extension(file.filename)
-        if extension not in settings.ALLOWED_FILE_EXTENSIONS:
+        if extension not in ALLOWED_EXTENSIONS:
             return {
                 "valid": False,
-                "error": f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_FILE_EXTENSIONS)}"
+                "error": f"File type not allowed. Allowed types: {ALLOWED_EXTENSIONS_DISPLAY}"
             }
 
         return {"valid": True}
@@ -70,23 +110,33 @@ class FileService:
         Returns:
             Optimized image bytes
         """
+        if self._is_already_optimized(content, extension, max_size):
+            return content
+
+        if pyvips is not None:
+            try:
+                return self._optimize_image_bytes_vips(content, extension, max_size)
+            except Exception as e:
+                logger.warning(f"libvips could not optimize image, falling back to Pillow: {str(e)}")
+
         try:
             img = Image.open(io.BytesIO(content))
 
+            # Resize if too large. This runs before flattening transparency so
+            # the composite only touches the downscaled pixels (Pillow
+            # resamples RGBA with premultiplied alpha, so edges match)
+            if img.width > max_size or img.height > max_size:
+                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
             # Convert RGBA to RGB if necessary
             if img.mode == 'RGBA':
                 rgb_img = Image.new('RGB', img.size, (255, 255, 255))
                 rgb_img.paste(img, mask=img.split()[3])
                 img = rgb_img
 
-            # Resize if too large
-            if img.width > max_size or img.height > max_size:
-                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-
             # Save to bytes with optimization
             output = io.BytesIO()
-            format_map = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'gif': 'GIF'}
-            save_format = format_map.get(extension.lower(), 'JPEG')
+            save_format = IMAGE_SAVE_FORMATS.get(extension.lower(), 'JPEG')
 
             if save_format == 'JPEG':
                 img.save(output, format=save_format, optimize=True, quality=85)
@@ -100,6 +150,43 @@ class FileService:
             # Return original content if optimization fails
             return content
 
+    def _is_already_optimized(self, content: bytes, extension: str, max_size: int) -> bool:
+        """
+        Check whether a JPEG already fits within max_size without decoding it
+
+        Image.open only parses the header, so this reads dimensions and mode
+        without touching pixel data. Such images would only be re-encoded at
+        a similar quality, so they are kept as uploaded.
+        """
+        if extension.lower() not in ("jpg", "jpeg"):
+            return False
+
+        try:
+            with Image.open(io.BytesIO(content)) as img:
+                return (
+                    img.format == "JPEG"
+                    and img.mode in ("RGB", "L")
+                    and img.width <= max_size
+                    and img.height <= max_size
+                )
+        except Exception:
+            return False
+
+    def _optimize_image_bytes_vips(self, content: bytes, extension: str, max_size: int) -> bytes:
+        """Resize and compress an image with libvips (same output rules as the Pillow path)"""
+        # thumbnail_buffer decodes at reduced size where the format allows it
+        # and never upscales
+        img = pyvips.Image.thumbnail_buffer(content, max_size, height=max_size, size="down")
+
+        # Flatten transparency onto white, as the Pillow path does for RGBA
+        if img.hasalpha():
+            img = img.flatten(background=[255, 255, 255])
+
+        if extension.lower() == "png":
+            return img.write_to_buffer(".png", compression=6)
+
+        return img.write_to_buffer(".jpg", Q=85, optimize_coding=True, strip=True)
+
     async def upload_file(
         self,
         user_id: str,
@@ -128,15 +215,22 @@ class FileService:
             if not user:
                 raise ValueError("User not found")
 
-            # Read file content
-            content = await file.read()
-            file_size = len(content)
             extension = self._get_file_extension(file.filename)
 
-            # Optimize image if it's an avatar or persona image
-            if category in ["avatar", "persona_image"] and extension in ["jpg", "jpeg", "png"]:
-                content = self._optimize_image_bytes(content, extension)
+            # Optimize image if it's an avatar or persona image. Decoding,
+            # resizing and re-encoding is CPU-bound, so it runs in a worker
+            # thread instead of blocking the event loop
+            if category in OPTIMIZED_IMAGE_CATEGORIES and extension in OPTIMIZED_IMAGE_EXTENSIONS:
+                content = await file.read()
+                content = await asyncio.to_thread(self._optimize_image_bytes, content, extension)
                 file_size = len(content)
+            else:
+                # Everything else is streamed to FileRunner straight from the
+                # spooled upload file instead of being read into memory. Large
+                # uploads have rolled over to disk, so the size probe (like the
+                # chunk reads in the upload) runs off the event loop
+                content = file.file
+                file_size = await asyncio.to_thread(self._rewound_size, content)
 
             # Upload to FileRunner
             filerunner_response = await filerunner_service.upload_file(
@@ -162,10 +256,12 @@ class FileService:
 
             self.db.add(uploaded_file)
 
-            # Update user storage usage
+            # Update user storage usage. The increment is a SQL expression
+            # (storage_used_bytes = storage_used_bytes + :size), so concurrent
+            # uploads can't overwrite each other's totals
             usage = user.usage_tracking
             if usage:
-                usage.storage_used_bytes += file_size
+                usage.storage_used_bytes = UsageTracking.storage_used_bytes + file_size
 
             self.db.commit()
             self.db.refresh(uploaded_file)
@@ -202,14 +298,39 @@ class FileService:
         skip: int = 0,
         limit: int = 50
     ) -> tuple[List[UploadedFile], int]:
-        """Get files uploaded by a user"""
+        """
+        Get files uploaded by a user
+
+        Only the columns the file list shows are loaded, and the total comes
+        from a COUNT(*) OVER () column on the page query itself (a separate
+        count is only issued for an empty page past the first one).
+        """
         query = self.db.query(UploadedFile).filter(UploadedFile.user_id == user_id)
 
         if category:
             query = query.filter(UploadedFile.category == category)
 
-        total = query.count()
-        files = query.order_by(UploadedFile.created_at.desc()).offset(skip).limit(limit).all()
+        rows = query.add_columns(
+            func.count().over().label("total")
+        ).options(
+            load_only(
+                UploadedFile.original_name,
+                UploadedFile.file_path,
+                UploadedFile.file_size,
+                UploadedFile.mime_type,
+                UploadedFile.category,
+                UploadedFile.created_at
+            )
+        ).order_by(UploadedFile.created_at.desc()).offset(skip).limit(limit).all()
+
+        files = [row[0] for row in rows]
+
+        if rows:
+            total = rows[0].total
+        elif skip:
+            total = query.count()
+        else:
+            total = 0
 
         return files, total
 
@@ -237,12 +358,17 @@ class FileService:
         # The FileRunner file will remain (could implement cleanup later)
         logger.warning(f"FileRunner file not deleted (requires JWT): {file.file_path}")
 
-        # Update storage usage
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user and user.usage_tracking:
-            user.usage_tracking.storage_used_bytes -= file.file_size
-            if user.usage_tracking.storage_used_bytes < 0:
-                user.usage_tracking.storage_used_bytes = 0
+        # Update storage usage in SQL (clamped at zero), without loading the
+        # user and usage rows or racing concurrent read-modify-writes
+        self.db.execute(
+            update(UsageTracking).where(
+                UsageTracking.user_id == user_id
+            ).values(
+                storage_used_bytes=func.greatest(
+                    UsageTracking.storage_used_bytes - file.file_size, 0
+                )
+            ).execution_options(synchronize_session=False)
+        )
 
         # Delete database record
         self.db.delete(file)
@@ -1,13 +1,52 @@
 """FileRunner service for handling file uploads to external storage"""
+import aiofiles
+import asyncio
 import httpx
 import logging
-from typing import Optional, Dict, Any, BinaryIO
+import mimetypes
+import uuid
+from types import MappingProxyType
+from typing import Optional, Dict, Any, AsyncIterator, BinaryIO, Union
 from pathlib import Path
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Connection pool for the shared FileRunner client: keep-alive connections are
+# reused across uploads (and kept for 5 minutes so bursts don't reconnect), and
+# HTTP/2 multiplexes concurrent uploads over them
+CLIENT_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=50, keepalive_expiry=300)
+
+# Connection attempts retried before an upload fails (httpx only retries
+# failures to connect, so no request body is ever sent twice)
+CLIENT_CONNECT_RETRIES = 2
+
+# Size of each file chunk written to the multipart upload body
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# FileRunner folder per upload category
+FOLDER_PATHS = {
+    "avatar": "avatars",
+    "persona_image": "persona_images",
+    "chat_attachment": "chat_attachments",
+    "knowledge_base": "knowledge_base",
+}
+
+# MIME type per file extension for uploads from disk; anything not listed
+# falls back to mimetypes.guess_type
+CONTENT_TYPES = MappingProxyType({
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'pdf': 'application/pdf',
+    'txt': 'text/plain',
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+    'm4a': 'audio/m4a',
+})
+
 
 class FileRunnerService:
     """Service for uploading files to FileRunner external storage"""
@@ -18,10 +57,17 @@ class FileRunnerService:
         self._client: Optional[httpx.AsyncClient] = None
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client"""
+        """Get or create the shared HTTP client"""
         if self._client is None or self._client.is_closed:
+            # With an explicit transport, HTTP/2 and the pool limits are set
+            # on the transport; the client-level options would be ignored
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
+                transport=httpx.AsyncHTTPTransport(
+                    http2=True,
+                    limits=CLIENT_LIMITS,
+                    retries=CLIENT_CONNECT_RETRIES
+                ),
                 timeout=60.0,
                 headers={
                     "X-API-Key": self.api_key,
@@ -37,17 +83,52 @@ class FileRunnerService:
 
     def _get_folder_path(self, category: str) -> str:
         """Map category to FileRunner folder path"""
-        folder_mapping = {
-            "avatar": "avatars",
-            "persona_image": "persona_images",
-            "chat_attachment": "chat_attachments",
-            "knowledge_base": "knowledge_base",
-        }
-        return folder_mapping.get(category, "misc")
+        return FOLDER_PATHS.get(category, "misc")
+
+    @staticmethod
+    async def _multipart_body(
+        boundary: str,
+        folder_path: str,
+        file_content: Union[bytes, BinaryIO, AsyncIterator[bytes]],
+        filename: str,
+        content_type: str
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield a multipart/form-data upload body piece by piece
+
+        The folder field and part headers are emitted first, then the file in
+        UPLOAD_CHUNK_SIZE chunks, then the closing boundary, so the encoded
+        body is never assembled in memory.
+        """
+        safe_name = filename.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="folder_path"\r\n\r\n'
+            f"{folder_path}\r\n"
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+
+        if isinstance(file_content, (bytes, bytearray)):
+            view = memoryview(file_content)
+            for start in range(0, len(view), UPLOAD_CHUNK_SIZE):
+                yield bytes(view[start:start + UPLOAD_CHUNK_SIZE])
+        elif hasattr(file_content, "__aiter__"):
+            async for chunk in file_content:
+                yield chunk
+        else:
+            # File objects (e.g. a spooled upload that has rolled over to
+            # disk) are read in a worker thread so the event loop never
+            # waits on disk I/O
+            while chunk := await asyncio.to_thread(file_content.read, UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+        yield f"\r\n--{boundary}--\r\n".encode()
 
     async def upload_file(
         self,
-        file_content: bytes,
+        file_content: Union[bytes, BinaryIO, AsyncIterator[bytes]],
         filename: str,
         content_type: str,
         category: str = "misc"
@@ -56,7 +137,10 @@ class FileRunnerService:
         Upload a file to FileRunner
 
         Args:
-            file_content: Binary content of the file
+            file_content: Binary content of the file, a binary file object
+                positioned at its start, or an async iterator of chunks;
+                either way the multipart body is streamed in chunks and never
+                built in memory
             filename: Original filename
             content_type: MIME type of the file
             category: File category (avatar, persona_image, chat_attachment, knowledge_base)
@@ -74,19 +158,18 @@ class FileRunnerService:
             client = await self._get_client()
             folder_path = self._get_folder_path(category)
 
-            # Prepare multipart form data
-            files = {
-                "file": (filename, file_content, content_type)
-            }
-            data = {
-                "folder_path": folder_path
-            }
-
-            response = await client.post(
+            # Stream the multipart form data instead of letting httpx encode
+            # the whole body up front
+            boundary = f"----aip{uuid.uuid4().hex}"
+            request = client.build_request(
+                "POST",
                 "/api/upload",
-                files=files,
-                data=data
+                content=self._multipart_body(
+                    boundary, folder_path, file_content, filename, content_type
+                ),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
             )
+            response = await client.send(request)
 
             if response.status_code != 200:
                 logger.error(f"FileRunner upload failed: {response.status_code} - {response.text}")
@@ -111,6 +194,11 @@ class FileRunnerService:
         """
         Upload a file from filesystem path to FileRunner
 
+        The file is read with aiofiles in UPLOAD_CHUNK_SIZE chunks as the
+        multipart body is sent, so disk reads neither block the event loop nor
+        load the whole file into memory; the handle is closed once the upload
+        finishes or fails.
+
         Args:
             file_path: Path to the file on disk
             category: File category
@@ -124,24 +212,19 @@ class FileRunnerService:
 
         # Determine content type
         extension = path.suffix.lower().lstrip('.')
-        content_type_mapping = {
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'gif': 'image/gif',
-            'pdf': 'application/pdf',
-            'txt': 'text/plain',
-            'mp3': 'audio/mpeg',
-            'wav': 'audio/wav',
-            'm4a': 'audio/m4a',
-        }
-        content_type = content_type_mapping.get(extension, 'application/octet-stream')
-
-        with open(file_path, 'rb') as f:
-            content = f.read()
+        content_type = (
+            CONTENT_TYPES.get(extension)
+            or mimetypes.guess_type(path.name)[0]
+            or 'application/octet-stream'
+        )
+
+        async def read_chunks() -> AsyncIterator[bytes]:
+            async with aiofiles.open(file_path, 'rb') as f:
+                while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                    yield chunk
 
         return await self.upload_file(
-            file_content=content,
+            file_content=read_chunks(),
             filename=path.name,
             content_type=content_type,
             category=category
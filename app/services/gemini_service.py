@@ -1,13 +1,22 @@
 """AI Service for generating responses via Gemini (primary) and Freeway API (fallback)"""
 import httpx
 from app.config import settings
+from app.core.cache import get_redis
+from app.database import SessionLocal
 from app.models.persona import Persona, KnowledgeBase
 from app.models.user import User, UsageTracking
 from app.models.chat import ChatMessage
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional, AsyncIterator
+from app.utils.time_utils import utc_now
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import select, func, update
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from collections import OrderedDict, deque
+import asyncio
 import logging
-import json
+import orjson
+import re
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +24,194 @@ logger = logging.getLogger(__name__)
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
 GEMINI_STREAM_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
 
+# Sentiment indicators, matched as whole words (case-insensitively, so the
+# text isn't lowercased first) in a single pass; the named group of each match
+# tells which side it counts for
+SENTIMENT_RE = re.compile(
+    r"(?P<positive>\b(?:happy|great|excellent|good|wonderful|amazing|love|yes)\b|!)"
+    r"|(?P<negative>\b(?:sorry|sad|bad|terrible|no|unfortunately|problem|issue)\b)",
+    re.IGNORECASE
+)
+
+# Redis counter of a free-tier user's messages for one UTC day. It is bumped
+# atomically before generating, so concurrent requests can't all slip past the
+# daily limit; UsageTracking stays the durable record
+DAILY_MESSAGES_KEY = "usage:messages:v1:{user_id}:{day}"
+DAILY_MESSAGES_KEY_TTL_SECONDS = 2 * 24 * 60 * 60
+
+# Trailing characters of a streamed reply kept for sentiment analysis
+SENTIMENT_TAIL_CHARS = 2048
+
+# Built system prompts per persona id: (signature, prompt), least recently
+# used evicted first. The signature covers every input of the prompt, so a
+# persona or knowledge base edit simply misses and rebuilds.
+SYSTEM_PROMPT_CACHE_SIZE = 256
+_system_prompts: "OrderedDict[str, Tuple[tuple, str]]" = OrderedDict()
+_system_prompts_lock = threading.Lock()
+
+# Closing instructions of every system prompt, with length optimization
+RESPONSE_GUIDELINES = """
+RESPONSE GUIDELINES:
+- Keep responses concise and conversational - typically 1-3 short paragraphs
+- Get to the point quickly without unnecessary preamble or filler
+- Only give longer, detailed responses when:
+  * The user explicitly asks for more detail, explanation, or elaboration
+  * The topic genuinely requires thorough explanation (complex questions, tutorials, etc.)
+  * You're telling a story or creative content the user requested
+- Avoid repetition, excessive qualifiers, and verbose language
+- Don't pad responses with unnecessary pleasantries or restatements
+- Stay in character while being efficient with words
+
+Respond to the user's messages while staying in character and using the knowledge provided above."""
+
+
+def chunk_event(content: str) -> bytes:
+    """
+    Encode one streamed text delta as a {"chunk": ...} event payload
+
+    Only the text needs JSON escaping, so it is spliced into a fixed
+    template instead of serializing a fresh dict for every delta. The
+    payload stays bytes all the way to the response.
+    """
+    return b'{"chunk":' + orjson.dumps(content) + b'}'
+
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[bytearray]:
+    """
+    Yield the payload of each non-empty "data: " line of a server-sent event stream
+
+    Works on the raw byte stream with a reusable buffer instead of
+    aiter_lines(), which decodes every chunk to str before splitting it.
+    Each payload is a single bytearray slice of the buffer (the line's
+    trailing CR excluded up front rather than stripped from a copy), which
+    orjson parses directly; empty keep-alive lines are skipped before they
+    reach the parser.
+    """
+    buffer = bytearray()
+
+    async for chunk in response.aiter_bytes():
+        buffer += chunk
+        start = 0
+
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            if buffer.startswith(b"data: ", start):
+                stop = end - 1 if buffer[end - 1] == 0x0D else end
+                if stop > start + 6:
+                    yield buffer[start + 6:stop]
+            start = end + 1
+
+        del buffer[:start]
+
+    # A final event may arrive without a trailing newline
+    if buffer.startswith(b"data: "):
+        payload = buffer[6:].rstrip(b"\r")
+        if payload:
+            yield payload
+
+
+# Circuit breaker for Gemini: after GEMINI_FAILURE_THRESHOLD upstream failures
+# (5xx, 429 or connection errors) within GEMINI_FAILURE_WINDOW_SECONDS, requests
+# go straight to Freeway for GEMINI_COOLDOWN_SECONDS instead of waiting on a
+# Gemini call that is likely to fail first
+GEMINI_FAILURE_THRESHOLD = 5
+GEMINI_FAILURE_WINDOW_SECONDS = 30
+GEMINI_COOLDOWN_SECONDS = 30
+
+_gemini_failures: deque = deque()
+_gemini_open_until = 0.0
+_gemini_breaker_lock = threading.Lock()
+
+
+def gemini_circuit_open() -> bool:
+    """Whether Gemini is currently being skipped in favor of Freeway"""
+    return time.monotonic() < _gemini_open_until
+
+
+def record_gemini_failure(error: Exception):
+    """Count an upstream Gemini failure, opening the circuit past the threshold"""
+    global _gemini_open_until
+
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        if status_code < 500 and status_code != 429:
+            return
+    elif not isinstance(error, httpx.TransportError):
+        return
+
+    now = time.monotonic()
+    with _gemini_breaker_lock:
+        _gemini_failures.append(now)
+        while _gemini_failures and _gemini_failures[0] < now - GEMINI_FAILURE_WINDOW_SECONDS:
+            _gemini_failures.popleft()
+
+        if len(_gemini_failures) >= GEMINI_FAILURE_THRESHOLD and now >= _gemini_open_until:
+            _gemini_open_until = now + GEMINI_COOLDOWN_SECONDS
+            _gemini_failures.clear()
+            logger.warning(
+                f"Gemini circuit opened after {GEMINI_FAILURE_THRESHOLD} failures "
+                f"in {GEMINI_FAILURE_WINDOW_SECONDS}s; using Freeway for {GEMINI_COOLDOWN_SECONDS}s"
+            )
+
+
+def record_gemini_success():
+    """Reset the failure count (and close the circuit) after a Gemini success"""
+    global _gemini_open_until
+
+    with _gemini_breaker_lock:
+        if _gemini_open_until:
+            logger.info("Gemini circuit closed")
+        _gemini_failures.clear()
+        _gemini_open_until = 0.0
+
+
+# Background usage writes for streamed turns that haven't finished yet; held
+# here so they aren't garbage collected and their failures get logged
+_pending_turn_writes: set = set()
+
+
+def _turn_write_done(future: "asyncio.Future") -> None:
+    """Forget a finished streamed-turn write, logging it if it failed"""
+    _pending_turn_writes.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Recording streamed turn failed: {str(future.exception())}")
+
+
+# Connection pool for the shared AI client
+CLIENT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client for Gemini and Freeway requests (lazy loading)
+
+    Connections are kept alive and reused across requests, so only the first
+    call to each host pays for the TCP and TLS handshakes; with HTTP/2,
+    concurrent chats are multiplexed over the same connection. Requests are
+    not coalesced into batches: neither generateContent nor Freeway's
+    chat/completions accepts several conversations in one call, so batching
+    would only add queueing delay on top of these concurrent requests.
+    """
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(http2=True, timeout=60.0, limits=CLIENT_LIMITS)
+
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client"""
+    global _http_client
+
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
 
 class GeminiService:
     """
@@ -30,61 +227,199 @@ class GeminiService:
         # Freeway config (fallback)
         self.freeway_url = settings.FREEWAY_API_URL
         self.freeway_key = settings.FREEWAY_API_KEY
+        self.cache = get_redis()
+        # Daily message counter reserved for the current turn, if any
+        self._reserved_messages_key: Optional[str] = None
+        # Request targets and headers, built once per service instead of per call
+        self.gemini_generate_url = (
+            GEMINI_API_URL.format(model=self.gemini_model) + f"?key={self.gemini_api_key}"
+        )
+        self.gemini_stream_url = (
+            GEMINI_STREAM_URL.format(model=self.gemini_model) + f"?key={self.gemini_api_key}&alt=sse"
+        )
+        self.freeway_completions_url = f"{self.freeway_url}/chat/completions"
+        self.freeway_headers = {
+            "Content-Type": "application/json",
+            "X-Api-Key": self.freeway_key
+        }
 
     def _build_system_prompt(self, persona: Persona, knowledge_bases: List[KnowledgeBase]) -> str:
         """
         Build system prompt from persona configuration and knowledge bases
+
+        The knowledge base section is rendered with a single join and added
+        as one part, so the final join makes just one pass over KB content.
         """
         prompt_parts = []
+        add = prompt_parts.append
 
         # Base persona identity
-        prompt_parts.append(f"You are {persona.name}.")
+        add(f"You are {persona.name}.")
 
         if persona.bio:
-            prompt_parts.append(f"Bio: {persona.bio}")
+            add(f"Bio: {persona.bio}")
 
         if persona.description:
-            prompt_parts.append(f"Description: {persona.description}")
+            add(f"Description: {persona.description}")
 
         # Personality traits
         if persona.personality_traits:
-            traits = ", ".join(persona.personality_traits)
-            prompt_parts.append(f"Personality traits: {traits}")
+            add("Personality traits: " + ", ".join(persona.personality_traits))
 
         # Language style
         if persona.language_style:
-            prompt_parts.append(f"Communication style: {persona.language_style}")
+            add(f"Communication style: {persona.language_style}")
 
         # Expertise areas
         if persona.expertise:
-            expertise = ", ".join(persona.expertise)
-            prompt_parts.append(f"Areas of expertise: {expertise}")
+            add("Areas of expertise: " + ", ".join(persona.expertise))
 
         # Knowledge base content
-        if knowledge_bases:
-            prompt_parts.append("\nKnowledge Base:")
-            for kb in knowledge_bases:
-                if kb.status == "active" and kb.content:
-                    prompt_parts.append(f"\n--- {kb.source_name or kb.source_type} ---")
-                    prompt_parts.append(kb.content)
+        knowledge = "\n\n".join(
+            f"--- {kb.source_name or kb.source_type} ---\n\n{kb.content}"
+            for kb in knowledge_bases
+            if kb.status == "active" and kb.content
+        )
+        if knowledge:
+            add("Knowledge Base:\n\n" + knowledge)
 
         # Final instruction with length optimization
-        prompt_parts.append("""
-RESPONSE GUIDELINES:
-- Keep responses concise and conversational - typically 1-3 short paragraphs
-- Get to the point quickly without unnecessary preamble or filler
-- Only give longer, detailed responses when:
-  * The user explicitly asks for more detail, explanation, or elaboration
-  * The topic genuinely requires thorough explanation (complex questions, tutorials, etc.)
-  * You're telling a story or creative content the user requested
-- Avoid repetition, excessive qualifiers, and verbose language
-- Don't pad responses with unnecessary pleasantries or restatements
-- Stay in character while being efficient with words
-
-Respond to the user's messages while staying in character and using the knowledge provided above.""")
+        add(RESPONSE_GUIDELINES)
 
         return "\n\n".join(prompt_parts)
 
+    def _get_user_with_usage(self, user_id: str) -> Tuple[User, UsageTracking]:
+        """
+        Load a user together with their usage tracking row in one query
+
+        A missing usage row is created and flushed (not committed).
+        """
+        user = self.db.scalars(
+            select(User)
+            .options(joinedload(User.usage_tracking))
+            .where(User.id == user_id)
+        ).first()
+        if not user:
+            raise ValueError("User not found")
+
+        usage = user.usage_tracking
+        if not usage:
+            usage = UsageTracking(user_id=user_id)
+            self.db.add(usage)
+            self.db.flush()
+
+        return user, usage
+
+    def _get_persona_with_kb_state(self, persona_id: str) -> Tuple[Persona, Tuple[int, Any]]:
+        """
+        Load a persona and the state of its active knowledge bases in one query
+
+        The state (count and latest update) is what _get_system_prompt needs
+        to decide whether a cached prompt is still valid. Only the persona
+        columns the prompt and turn bookkeeping read are loaded.
+        """
+        active_kb = (
+            KnowledgeBase.persona_id == Persona.id,
+            KnowledgeBase.status == "active"
+        )
+        row = self.db.execute(
+            select(
+                Persona,
+                select(func.count(KnowledgeBase.id))
+                .where(*active_kb)
+                .correlate(Persona)
+                .scalar_subquery(),
+                select(func.max(KnowledgeBase.updated_at))
+                .where(*active_kb)
+                .correlate(Persona)
+                .scalar_subquery()
+            ).options(
+                load_only(
+                    Persona.name,
+                    Persona.bio,
+                    Persona.description,
+                    Persona.personality_traits,
+                    Persona.language_style,
+                    Persona.expertise,
+                    Persona.conversation_count
+                )
+            ).where(Persona.id == persona_id)
+        ).first()
+        if not row:
+            raise ValueError("Persona not found")
+
+        return row[0], (row[1], row[2])
+
+    def _get_system_prompt(
+        self,
+        persona: Persona,
+        kb_state: Optional[Tuple[int, Any]] = None
+    ) -> str:
+        """
+        Get the system prompt for a persona, rebuilding it only when changed
+
+        A single aggregate over the persona's active knowledge bases (count
+        and latest update) stands in for their content, so unchanged
+        knowledge bases aren't loaded or re-joined on every message. Pass
+        kb_state from _get_persona_with_kb_state to skip that aggregate query.
+        """
+        if kb_state is None:
+            kb_state = self.db.execute(
+                select(
+                    func.count(KnowledgeBase.id),
+                    func.max(KnowledgeBase.updated_at)
+                ).where(
+                    KnowledgeBase.persona_id == persona.id,
+                    KnowledgeBase.status == "active"
+                )
+            ).one()
+        kb_count, kb_updated_at = kb_state
+
+        # persona.updated_at also moves with conversation_count, so the
+        # prompt fields themselves are part of the signature instead
+        signature = (
+            persona.name,
+            persona.bio,
+            persona.description,
+            tuple(persona.personality_traits or ()),
+            persona.language_style,
+            tuple(persona.expertise or ()),
+            kb_count,
+            kb_updated_at
+        )
+        persona_key = str(persona.id)
+
+        with _system_prompts_lock:
+            cached = _system_prompts.get(persona_key)
+            if cached is not None and cached[0] == signature:
+                _system_prompts.move_to_end(persona_key)
+                return cached[1]
+
+        # A total order keeps the prompt byte-identical between rebuilds, so
+        # upstream prompt-prefix caching keeps hitting
+        knowledge_bases = self.db.execute(
+            select(
+                KnowledgeBase.source_name,
+                KnowledgeBase.source_type,
+                KnowledgeBase.content,
+                KnowledgeBase.status
+            ).where(
+                KnowledgeBase.persona_id == persona.id,
+                KnowledgeBase.status == "active",
+                KnowledgeBase.content.isnot(None)
+            ).order_by(KnowledgeBase.created_at, KnowledgeBase.id)
+        ).all()
+
+        system_prompt = self._build_system_prompt(persona, knowledge_bases)
+
+        with _system_prompts_lock:
+            _system_prompts[persona_key] = (signature, system_prompt)
+            _system_prompts.move_to_end(persona_key)
+            while len(_system_prompts) > SYSTEM_PROMPT_CACHE_SIZE:
+                _system_prompts.popitem(last=False)
+
+        return system_prompt
+
     def _build_conversation_history(
         self,
         messages: List[ChatMessage],
@@ -92,58 +427,154 @@ Respond to the user's messages while staying in character and using the knowledg
     ) -> List[Dict[str, str]]:
         """
         Build conversation history from chat messages in OpenAI format
+
+        Messages must already be in chronological order; callers fetch just
+        the most recent ones from the database (newest first, LIMIT, then
+        reversed), so no sorting happens here.
         """
         # Use config default if not specified
         if limit is None:
             limit = settings.AI_MAX_CONVERSATION_HISTORY
 
-        # Get recent messages (sorted by created_at)
-        recent_messages = sorted(messages, key=lambda x: x.created_at)[-limit:]
-
-        history = []
-        for msg in recent_messages:
-            role = "user" if msg.sender_type == "user" else "assistant"
-            history.append({
-                "role": role,
+        return [
+            {
+                "role": "user" if msg.sender_type == "user" else "assistant",
                 "content": msg.text
-            })
+            }
+            for msg in messages[-limit:]
+        ]
+
+    def _reserve_daily_message(self, user_id) -> Optional[int]:
+        """
+        Atomically count this turn against the user's daily messages in Redis
+
+        Returns the number of messages already used today (excluding this
+        one), or None when Redis is unavailable.
+        """
+        if self.cache is None:
+            return None
+
+        key = DAILY_MESSAGES_KEY.format(user_id=user_id, day=utc_now().strftime("%Y%m%d"))
+        try:
+            # Create the counter with its TTL and increment it in one MULTI,
+            # so a failure between the two can't leave a key that never expires
+            pipe = self.cache.pipeline()
+            pipe.set(key, 0, ex=DAILY_MESSAGES_KEY_TTL_SECONDS, nx=True)
+            pipe.incr(key)
+            count = pipe.execute()[1]
+        except Exception as e:
+            logger.warning(f"Failed to reserve daily message for user {user_id}: {str(e)}")
+            return None
+
+        self._reserved_messages_key = key
+        return count - 1
 
-        return history
+    def _release_daily_message(self):
+        """Give back the reserved daily message when the turn doesn't complete"""
+        key = self._reserved_messages_key
+        if key is None:
+            return
+
+        self._reserved_messages_key = None
+        try:
+            self.cache.decr(key)
+        except Exception as e:
+            logger.warning(f"Failed to release daily message {key}: {str(e)}")
 
     def _check_usage_limits(self, user: User, usage: UsageTracking) -> Dict[str, Any]:
         """
         Check if user has exceeded usage limits
         Returns dict with 'allowed' boolean and 'reason' if not allowed
+
+        A daily counter reset is only staged on the session; it is committed
+        together with the rest of the turn's writes. For free users the turn
+        is also reserved on the Redis daily counter (when configured); the
+        caller keeps or releases it once the turn completes or fails.
         """
         # Reset daily counters if needed
         usage.check_and_reset_daily()
-        self.db.commit()
 
         # Premium users have unlimited usage
         if user.is_premium:
             return {"allowed": True}
 
-        # Free tier limits
-        if usage.messages_today >= settings.FREE_TIER_MESSAGE_LIMIT:
+        # Free tier limits. The database count covers turns from before the
+        # Redis counter existed (or while it was unreachable)
+        used = usage.messages_today
+        reserved = self._reserve_daily_message(user.id)
+        if reserved is not None:
+            used = max(used, reserved)
+
+        if used >= settings.FREE_TIER_MESSAGE_LIMIT:
+            self._release_daily_message()
             return {
                 "allowed": False,
                 "reason": f"Daily message limit reached ({settings.FREE_TIER_MESSAGE_LIMIT} messages/day for free tier)",
                 "limit": settings.FREE_TIER_MESSAGE_LIMIT,
-                "used": usage.messages_today
+                "used": used
             }
 
         return {"allowed": True}
 
-    def _update_usage_tracking(
+    def _stage_usage_tracking(
         self,
         usage: UsageTracking,
         tokens_used: int
     ):
-        """Update usage tracking after successful generation"""
+        """Stage usage tracking updates after successful generation (caller commits)"""
         usage.messages_today += 1
         usage.gemini_api_calls_today += 1
         usage.gemini_tokens_used_total += tokens_used
-        self.db.commit()
+
+    def _commit_turn(self, usage: UsageTracking, persona: Persona, tokens_used: int):
+        """Record a completed generation: usage counters and persona count in one commit"""
+        self._stage_usage_tracking(usage, tokens_used)
+        persona.conversation_count += 1
+
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _persist_turn(self, user_id: str, persona_id: str, tokens_used: int):
+        """
+        Record a completed streamed generation in a short-lived session
+
+        Runs after the final stream frame has gone out, so the request's own
+        session (and its staged usage changes) can't be relied on; the daily
+        reset is re-applied here and the persona count bumped in SQL.
+        """
+        db = SessionLocal()
+        try:
+            usage = db.scalars(
+                select(UsageTracking)
+                .where(UsageTracking.user_id == user_id)
+                .with_for_update()
+            ).first()
+            if usage is None:
+                usage = UsageTracking(
+                    user_id=user_id,
+                    messages_today=0,
+                    gemini_api_calls_today=0,
+                    gemini_tokens_used_total=0
+                )
+                db.add(usage)
+            else:
+                usage.check_and_reset_daily()
+
+            self._stage_usage_tracking(usage, tokens_used)
+            db.execute(
+                update(Persona)
+                .where(Persona.id == persona_id)
+                .values(conversation_count=Persona.conversation_count + 1)
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record streamed turn for user {user_id}: {str(e)}")
+        finally:
+            db.close()
 
     async def _make_gemini_request(
         self,
@@ -191,12 +622,10 @@ Respond to the user's messages while staying in character and using the knowledg
         if max_tokens:
             request_body["generationConfig"]["maxOutputTokens"] = max_tokens
 
-        api_url = GEMINI_API_URL.format(model=self.gemini_model) + f"?key={self.gemini_api_key}"
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(api_url, json=request_body)
-            response.raise_for_status()
-            return response.json()
+        client = get_http_client()
+        response = await client.post(self.gemini_generate_url, json=request_body)
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     async def _make_freeway_request(
         self,
@@ -216,17 +645,14 @@ Respond to the user's messages while staying in character and using the knowledg
         """
         request_payload = {**payload, "model": "paid"}
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{self.freeway_url}/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Api-Key": self.freeway_key
-                },
-                json=request_payload
-            )
-            response.raise_for_status()
-            return response.json()
+        client = get_http_client()
+        response = await client.post(
+            self.freeway_completions_url,
+            headers=self.freeway_headers,
+            json=request_payload
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     async def generate_response(
         self,
@@ -253,17 +679,7 @@ Respond to the user's messages while staying in character and using the knowledg
         """
         try:
             # Get user and usage tracking
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if not user:
-                raise ValueError("User not found")
-
-            usage = user.usage_tracking
-            if not usage:
-                # Create usage tracking if not exists
-                usage = UsageTracking(user_id=user_id)
-                self.db.add(usage)
-                self.db.commit()
-                self.db.refresh(usage)
+            user, usage = self._get_user_with_usage(user_id)
 
             # Check usage limits
             limit_check = self._check_usage_limits(user, usage)
@@ -281,19 +697,11 @@ Respond to the user's messages while staying in character and using the knowledg
             if max_tokens is None:
                 max_tokens = settings.AI_DEFAULT_MAX_TOKENS
 
-            # Get persona
-            persona = self.db.query(Persona).filter(Persona.id == persona_id).first()
-            if not persona:
-                raise ValueError("Persona not found")
+            # Get persona along with its knowledge base state
+            persona, kb_state = self._get_persona_with_kb_state(persona_id)
 
-            # Get knowledge bases
-            knowledge_bases = self.db.query(KnowledgeBase).filter(
-                KnowledgeBase.persona_id == persona_id,
-                KnowledgeBase.status == "active"
-            ).all()
-
-            # Build system prompt
-            system_prompt = self._build_system_prompt(persona, knowledge_bases)
+            # Build system prompt (cached until the persona or its knowledge changes)
+            system_prompt = self._get_system_prompt(persona, kb_state)
 
             # Build conversation history in OpenAI format
             history = self._build_conversation_history(conversation_history)
@@ -316,8 +724,12 @@ Respond to the user's messages while staying in character and using the knowledg
             # Try Gemini first, fallback to Freeway paid
             used_model = f"gemini-{self.gemini_model}"
             response_text = None
+            tokens_used = None
 
             try:
+                if gemini_circuit_open():
+                    raise RuntimeError("Gemini circuit open")
+
                 logger.info(f"Attempting request with Gemini ({self.gemini_model})")
                 result = await self._make_gemini_request(
                     system_prompt=system_prompt,
@@ -337,14 +749,18 @@ Respond to the user's messages while staying in character and using the knowledg
                 if not response_text:
                     raise ValueError("Empty response from Gemini")
 
+                tokens_used = result.get("usageMetadata", {}).get("candidatesTokenCount")
+                record_gemini_success()
                 logger.info("Gemini request successful")
 
             except Exception as gemini_error:
+                record_gemini_failure(gemini_error)
                 logger.warning(f"Gemini failed: {str(gemini_error)}. Falling back to Freeway paid...")
 
                 try:
                     result = await self._make_freeway_request(freeway_payload)
                     response_text = result["choices"][0]["message"]["content"]
+                    tokens_used = (result.get("usage") or {}).get("completion_tokens")
                     used_model = "freeway-paid"
                     logger.info("Freeway paid fallback succeeded")
                 except httpx.HTTPStatusError as freeway_error:
@@ -355,17 +771,15 @@ Respond to the user's messages while staying in character and using the knowledg
                     raise freeway_error
 
             # Get token usage (estimate if not provided)
-            tokens_used = len(response_text) // 4
+            if tokens_used is None:
+                tokens_used = len(response_text) // 4
 
             # Perform simple sentiment analysis
             sentiment = self._analyze_sentiment(response_text)
 
-            # Update usage tracking
-            self._update_usage_tracking(usage, tokens_used)
-
-            # Update persona conversation count
-            persona.conversation_count += 1
-            self.db.commit()
+            # Update usage tracking and persona conversation count
+            self._commit_turn(usage, persona, tokens_used)
+            self._reserved_messages_key = None
 
             return {
                 "response": response_text,
@@ -384,21 +798,21 @@ Respond to the user's messages while staying in character and using the knowledg
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             raise
+        finally:
+            self._release_daily_message()
 
     def _analyze_sentiment(self, text: str) -> str:
         """
         Basic sentiment analysis
         In production, you could use a proper sentiment model
         """
-        text_lower = text.lower()
-
-        # Positive indicators
-        positive_words = ['happy', 'great', 'excellent', 'good', 'wonderful', 'amazing', 'love', 'yes', '!']
-        # Negative indicators
-        negative_words = ['sorry', 'sad', 'bad', 'terrible', 'no', 'unfortunately', 'problem', 'issue']
-
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        positive_count = 0
+        negative_count = 0
+        for match in SENTIMENT_RE.finditer(text):
+            if match.lastgroup == "positive":
+                positive_count += 1
+            else:
+                negative_count += 1
 
         if positive_count > negative_count:
             return "positive"
@@ -412,11 +826,15 @@ Respond to the user's messages while staying in character and using the knowledg
         system_prompt: str,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
     ) -> AsyncIterator[str]:
         """
         Stream response from Gemini API.
 
+        If a usage dict is given, "completion_tokens" is set from the
+        stream's usageMetadata.
+
         Yields:
             Content chunks as they arrive
         """
@@ -441,63 +859,78 @@ Respond to the user's messages while staying in character and using the knowledg
             "generationConfig": generation_config
         }
 
-        api_url = GEMINI_STREAM_URL.format(model=self.gemini_model) + f"?key={self.gemini_api_key}&alt=sse"
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            async with client.stream("POST", api_url, json=request_body) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        try:
-                            chunk_data = json.loads(data)
-                            candidates = chunk_data.get("candidates", [])
-                            if candidates:
-                                parts = candidates[0].get("content", {}).get("parts", [])
-                                for part in parts:
-                                    text = part.get("text", "")
-                                    if text:
-                                        yield text
-                        except json.JSONDecodeError:
-                            continue
+        client = get_http_client()
+        async with client.stream("POST", self.gemini_stream_url, json=request_body) as response:
+            response.raise_for_status()
+            async for data in iter_sse_data(response):
+                try:
+                    chunk_data = orjson.loads(data)
+                    # Every chunk carries running totals; the last one wins
+                    usage_metadata = chunk_data.get("usageMetadata")
+                    if usage is not None and usage_metadata:
+                        tokens = usage_metadata.get("candidatesTokenCount")
+                        if tokens is not None:
+                            usage["completion_tokens"] = tokens
+                    candidates = chunk_data.get("candidates", [])
+                    if candidates:
+                        parts = candidates[0].get("content", {}).get("parts", [])
+                        for part in parts:
+                            text = part.get("text", "")
+                            if text:
+                                yield text
+                except orjson.JSONDecodeError:
+                    continue
 
     async def _stream_from_freeway(
         self,
-        payload: Dict[str, Any]
+        payload: Dict[str, Any],
+        usage: Optional[Dict[str, int]] = None
     ) -> AsyncIterator[str]:
         """
         Stream response from Freeway API (paid model).
 
+        Uses the shared HTTP/2 client, so a stream usually starts on an
+        already-open connection and the handshake stays out of the time to
+        first token.
+
+        If a usage dict is given, "completion_tokens" is set from the final
+        usage chunk requested with stream_options.include_usage.
+
         Yields:
             Content chunks as they arrive
         """
-        request_payload = {**payload, "model": "paid", "stream": True}
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            async with client.stream(
-                "POST",
-                f"{self.freeway_url}/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Api-Key": self.freeway_key
-                },
-                json=request_payload
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        if data == "[DONE]":
-                            break
-                        try:
-                            chunk_data = json.loads(data)
-                            if "choices" in chunk_data and len(chunk_data["choices"]) > 0:
-                                delta = chunk_data["choices"][0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                        except json.JSONDecodeError:
-                            continue
+        request_payload = {
+            **payload,
+            "model": "paid",
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+
+        client = get_http_client()
+        async with client.stream(
+            "POST",
+            self.freeway_completions_url,
+            headers=self.freeway_headers,
+            json=request_payload
+        ) as response:
+            response.raise_for_status()
+            async for data in iter_sse_data(response):
+                if data == b"[DONE]":
+                    break
+                try:
+                    chunk_data = orjson.loads(data)
+                    chunk_usage = chunk_data.get("usage")
+                    if usage is not None and chunk_usage:
+                        tokens = chunk_usage.get("completion_tokens")
+                        if tokens is not None:
+                            usage["completion_tokens"] = tokens
+                    if "choices" in chunk_data and len(chunk_data["choices"]) > 0:
+                        delta = chunk_data["choices"][0].get("delta", {})
+                        content = delta.get("content", "")
+                        if content:
+                            yield content
+                except orjson.JSONDecodeError:
+                    continue
 
     async def generate_streaming_response(
         self,
@@ -507,11 +940,11 @@ Respond to the user's messages while staying in character and using the knowledg
         conversation_history: List[ChatMessage],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[bytes]:
         """
         Generate streaming AI response using Gemini (primary) with Freeway paid fallback.
 
-        Yields response chunks as they arrive.
+        Yields response chunks as they arrive, as UTF-8 JSON event payloads.
         """
         try:
             # Apply config defaults for token optimization
@@ -521,38 +954,22 @@ Respond to the user's messages while staying in character and using the knowledg
                 max_tokens = settings.AI_DEFAULT_MAX_TOKENS
 
             # Similar setup as generate_response
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if not user:
-                raise ValueError("User not found")
-
-            usage = user.usage_tracking
-            if not usage:
-                usage = UsageTracking(user_id=user_id)
-                self.db.add(usage)
-                self.db.commit()
-                self.db.refresh(usage)
+            user, usage = self._get_user_with_usage(user_id)
 
             # Check usage limits
             limit_check = self._check_usage_limits(user, usage)
             if not limit_check["allowed"]:
-                yield json.dumps({
+                yield orjson.dumps({
                     "error": "usage_limit_exceeded",
                     "message": limit_check["reason"]
                 })
                 return
 
             # Get persona and knowledge
-            persona = self.db.query(Persona).filter(Persona.id == persona_id).first()
-            if not persona:
-                raise ValueError("Persona not found")
-
-            knowledge_bases = self.db.query(KnowledgeBase).filter(
-                KnowledgeBase.persona_id == persona_id,
-                KnowledgeBase.status == "active"
-            ).all()
+            persona, kb_state = self._get_persona_with_kb_state(persona_id)
 
             # Build prompts
-            system_prompt = self._build_system_prompt(persona, knowledge_bases)
+            system_prompt = self._get_system_prompt(persona, kb_state)
             history = self._build_conversation_history(conversation_history)
 
             # Build messages for Gemini (without system message)
@@ -572,51 +989,82 @@ Respond to the user's messages while staying in character and using the knowledg
 
             # Try Gemini first, fallback to Freeway paid
             used_model = f"gemini-{self.gemini_model}"
-            full_response = ""
+            # Only the tail of the reply is kept (for sentiment), plus its length
+            response_tail = deque(maxlen=SENTIMENT_TAIL_CHARS)
+            response_chars = 0
+            # Filled with the upstream completion token count, when reported
+            token_usage: Dict[str, int] = {}
 
             try:
-                logger.info(f"Attempting streaming request with Gemini ({self.gemini_model})")
-                async for content in self._stream_from_gemini(system_prompt, messages, temperature, max_tokens):
-                    full_response += content
-                    yield json.dumps({"chunk": content})
+                if gemini_circuit_open():
+                    raise RuntimeError("Gemini circuit open")
 
-                if not full_response:
+                logger.info(f"Attempting streaming request with Gemini ({self.gemini_model})")
+                async for content in self._stream_from_gemini(
+                    system_prompt, messages, temperature, max_tokens, usage=token_usage
+                ):
+                    response_tail.extend(content)
+                    response_chars += len(content)
+                    yield chunk_event(content)
+
+                if not response_chars:
                     raise ValueError("Empty response from Gemini streaming")
 
+                record_gemini_success()
                 logger.info("Gemini streaming succeeded")
 
             except Exception as gemini_error:
+                record_gemini_failure(gemini_error)
                 logger.warning(f"Gemini streaming failed: {str(gemini_error)}. Falling back to Freeway paid...")
 
-                # Reset full_response for fallback
-                full_response = ""
+                # Reset the reply and usage for fallback
+                response_tail.clear()
+                response_chars = 0
+                token_usage.clear()
                 try:
-                    async for content in self._stream_from_freeway(freeway_payload):
-                        full_response += content
-                        yield json.dumps({"chunk": content})
+                    async for content in self._stream_from_freeway(freeway_payload, usage=token_usage):
+                        response_tail.extend(content)
+                        response_chars += len(content)
+                        yield chunk_event(content)
                     used_model = "freeway-paid"
                     logger.info("Freeway paid streaming fallback succeeded")
                 except Exception as freeway_error:
                     logger.error(f"Freeway paid streaming also failed: {str(freeway_error)}")
-                    yield json.dumps({"error": f"Both Gemini and Freeway failed: {str(freeway_error)}"})
+                    yield orjson.dumps({"error": f"Both Gemini and Freeway failed: {str(freeway_error)}"})
                     return
 
-            # After streaming complete, update usage
-            tokens_used = len(full_response) // 4
-            self._update_usage_tracking(usage, tokens_used)
-
-            # Update persona count
-            persona.conversation_count += 1
-            self.db.commit()
+            # Fall back to an estimate if upstream didn't report usage
+            tokens_used = token_usage.get("completion_tokens", response_chars // 4)
+
+            sentiment = self._analyze_sentiment("".join(response_tail))
+
+            # Update usage and persona count off the event loop without
+            # holding up the end of the response. This is scheduled before
+            # the final frame goes out, so a client that disconnects while it
+            # is being sent still has the turn recorded (and keeps its daily
+            # message reserved). The staged daily reset and any new usage row
+            # are discarded here so this session doesn't keep row locks the
+            # background write would wait on.
+            persona_key = str(persona.id)
+            self.db.rollback()
+            persist = asyncio.get_running_loop().run_in_executor(
+                None, self._persist_turn, user_id, persona_key, tokens_used
+            )
+            _pending_turn_writes.add(persist)
+            persist.add_done_callback(_turn_write_done)
+            self._reserved_messages_key = None
 
             # Send final metadata
-            yield json.dumps({
+            yield orjson.dumps({
                 "done": True,
                 "tokens_used": tokens_used,
-                "sentiment": self._analyze_sentiment(full_response),
+                "sentiment": sentiment,
                 "model_used": used_model
             })
 
         except Exception as e:
             logger.error(f"Error in streaming response: {str(e)}")
-            yield json.dumps({"error": str(e)})
+            yield orjson.dumps({"error": str(e)})
+        finally:
+            # Also covers failed fallbacks and clients that disconnect mid-stream
+            self._release_daily_message()
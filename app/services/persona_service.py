@@ -1,6 +1,6 @@
 """Persona service for business logic"""
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, desc
+from sqlalchemy import or_, and_, desc, func, update
 from app.models.persona import Persona, KnowledgeBase
 from app.models.user import User, UsageTracking
 from app.models.chat import ChatSession
@@ -202,20 +202,22 @@ class PersonaService:
             raise ValueError("Persona not found or access denied")
 
         # Cache persona info to all chat sessions before deletion
-        # This allows users to still see persona name/image and clone it
-        deletion_time = utc_now()
-        sessions = self.db.query(ChatSession).filter(
-            ChatSession.persona_id == persona_id
-        ).all()
-
-        for session in sessions:
-            session.deleted_persona_name = persona.name
-            session.deleted_persona_image = persona.image_path
-            session.persona_deleted_at = deletion_time
+        # This allows users to still see persona name/image and clone it.
+        # One UPDATE stamped by the database (updated_at follows via onupdate),
+        # in naive UTC like the other timestamps
+        self.db.execute(
+            update(ChatSession).where(
+                ChatSession.persona_id == persona_id
+            ).values(
+                deleted_persona_name=persona.name,
+                deleted_persona_image=persona.image_path,
+                persona_deleted_at=func.timezone('utc', func.now())
+            ).execution_options(synchronize_session=False)
+        )
 
-        # Soft delete the persona
+        # Soft delete the persona (same transaction timestamp as the sessions)
         persona.status = "deleted"
-        persona.updated_at = deletion_time
+        persona.updated_at = func.timezone('utc', func.now())
 
         # Update usage count
         usage = self.db.query(UsageTracking).filter(UsageTracking.user_id == user_id).first()